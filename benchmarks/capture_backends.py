@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Capture backend benchmark - Grab time and memory per backend and region size
+
+Needs a display; run under xvfb-run (e.g. xvfb-run -s "-screen 0 3840x2160x24")
+to get a reproducible screen. "full+crop" is the old path of grabbing the
+whole screen and cropping afterwards, for comparison with region grabs.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from common import load_tool
+
+REGIONS = ["300x200", "1280x720", "full"]
+
+
+def time_grabs(grab, runs):
+    """Median time of runs grabs in ms, and the size of one result in MB"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        pixbuf = grab()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 2), round(pixbuf.get_byte_length() / 1048576, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="grabs per case (default: 20)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    tool = load_tool()
+    from gi.repository import Gdk
+
+    ok, _ = Gdk.init_check(sys.argv[:1])
+    if not ok or not Gdk.Display.get_default():
+        sys.exit("No display available, run under xvfb-run")
+    root = Gdk.Screen.get_default().get_root_window()
+    screen_width, screen_height = root.get_width(), root.get_height()
+
+    results = []
+    for name in sorted(tool.CAPTURE_BACKENDS):
+        try:
+            tool.set_capture_backend(name)
+        except tool.CaptureError as e:
+            print(f"{name:5} unavailable: {e}")
+            continue
+
+        cases = []
+        for region in REGIONS:
+            if region == "full":
+                width, height = screen_width, screen_height
+            else:
+                width, height = (int(v) for v in region.split("x"))
+            cases.append((f"{width}x{height}",
+                          lambda w=width, h=height: tool.grab_area(0, 0, w, h)))
+        cases.append(("full+crop", lambda: tool.crop_pixbuf(
+            tool.grab_area(0, 0, screen_width, screen_height), 0, 0, 300, 200).copy()))
+
+        for label, grab in cases:
+            median_ms, result_mb = time_grabs(grab, args.runs)
+            results.append({'backend': name, 'region': label,
+                            'median_ms': median_ms, 'result_mb': result_mb})
+            print(f"{name:5} {label:>11} {median_ms:9.2f} ms  {result_mb:7.2f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'screen': f"{screen_width}x{screen_height}", 'runs': args.runs,
+                       'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
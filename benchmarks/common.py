@@ -0,0 +1,23 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import importlib.util
+import os
+import resource
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRIPT = os.path.join(ROOT, "screenshot-crop.py")
+
+
+def load_tool():
+    """Import screenshot-crop.py as a module"""
+    spec = importlib.util.spec_from_file_location("screenshot_crop", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Crop memory benchmark - Peak RSS of cropping and saving a small region of a huge capture
+
+Each export method runs in its own process, since peak RSS never goes down.
+No display is needed: the capture is a synthetic in-memory pixbuf.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import load_tool, peak_rss_mb
+
+METHODS = {
+    'write_image': "write_image: savev on the subpixbuf view (current path)",
+    'stream': "Python PNG writer fed from strided row bands",
+    'copy': "subpixbuf copied, then savev (what format conversions used to need)",
+}
+
+
+def run_method(method, width, height, region):
+    """Crop and save once with method, return peak RSS growth and time"""
+    tool = load_tool()
+    from gi.repository import GdkPixbuf
+    
+    capture = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, False, 8, width, height)
+    capture.fill(0x3366ccff)
+    baseline = peak_rss_mb()
+    
+    x, y, w, h = region
+    output = os.path.join(tempfile.mkdtemp(), "crop.png")
+    start = time.perf_counter()
+    cropped = tool.crop_pixbuf(capture, x, y, w, h)
+    if method == 'write_image':
+        tool.write_image(cropped, output)
+    elif method == 'stream':
+        tool.write_png(output, cropped)
+    else:
+        cropped.copy().savev(output, "png", [], [])
+    elapsed = time.perf_counter() - start
+    os.remove(output)
+    
+    return {
+        'method': method,
+        'capture_mb': round(capture.get_byte_length() / 1048576, 1),
+        'peak_rss_growth_mb': round(peak_rss_mb() - baseline, 2),
+        'time_ms': round(elapsed * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="7680x4320", help="capture size (default: 8K)")
+    parser.add_argument("--region", default="1000,1000,400,300", help="x,y,w,h to crop")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--method", choices=METHODS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    width, height = (int(v) for v in args.size.split("x"))
+    region = [int(v) for v in args.region.split(",")]
+    
+    if args.method:
+        # Child process: measure a single method
+        print(json.dumps(run_method(args.method, width, height, region)))
+        return
+    
+    results = []
+    for method, description in METHODS.items():
+        output = subprocess.run(
+            [sys.executable, __file__, "--method", method,
+             "--size", args.size, "--region", args.region],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{method:7} {result['peak_rss_growth_mb']:8.2f} MB peak growth "
+              f"{result['time_ms']:8.2f} ms  {description}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Encoder benchmark - Encode time and file size per output format and setting
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import load_tool
+from samples import load_samples
+
+SETTINGS = [
+    ('png level 0', {'output_format': 'png', 'png_compression': 0}),
+    ('png level 1', {'output_format': 'png', 'png_compression': 1}),
+    ('png level 6', {'output_format': 'png', 'png_compression': 6}),
+    ('png level 9', {'output_format': 'png', 'png_compression': 9}),
+    ('jpeg q75', {'output_format': 'jpeg', 'jpeg_quality': 75}),
+    ('jpeg q90', {'output_format': 'jpeg', 'jpeg_quality': 90}),
+    ('webp q80', {'output_format': 'webp', 'webp_quality': 80}),
+    ('webp q90', {'output_format': 'webp', 'webp_quality': 90}),
+]
+
+
+def measure(tool, pixbuf, settings, repeats):
+    """Best encode time in ms and resulting size in bytes"""
+    output = os.path.join(tempfile.mkdtemp(), "sample.out")
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        tool.write_image(pixbuf, output, settings)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    size = os.path.getsize(output)
+    os.remove(output)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--repeats", type=int, default=3, help="runs per setting (default: 3)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    
+    tool = load_tool()
+    available = tool.writable_formats()
+    samples = load_samples()
+    
+    results = []
+    print(f"| {'sample':10} | {'setting':12} | {'time ms':>8} | {'size KB':>8} |")
+    print(f"|{'-' * 12}|{'-' * 14}|{'-' * 10}|{'-' * 10}|")
+    for sample, pixbuf in samples.items():
+        for label, settings in SETTINGS:
+            if settings['output_format'] not in available:
+                continue
+            elapsed, size = measure(tool, pixbuf, settings, args.repeats)
+            results.append({
+                'sample': sample,
+                'size': f"{pixbuf.get_width()}x{pixbuf.get_height()}",
+                'setting': label,
+                'settings': settings,
+                'time_ms': round(elapsed, 1),
+                'bytes': size
+            })
+            print(f"| {sample:10} | {label:12} | {elapsed:8.1f} | {size / 1024:8.1f} |")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
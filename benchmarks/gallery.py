@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Gallery benchmark - Listing time and scroll smoothness of the gallery on a large folder
+
+Needs a display; run under xvfb-run. A temporary folder is filled with small
+PNG files (20000 by default) and opened in the gallery, with a private
+thumbnail cache. The list is then scrolled from top to bottom at a steady
+pace while thumbnails stream in, and the intervals between painted frames
+are recorded.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from common import load_tool, peak_rss_mb
+
+
+def make_folder(count):
+    """Folder of count small, distinct PNG files"""
+    from gi.repository import GdkPixbuf
+
+    folder = tempfile.mkdtemp(prefix="gallery-benchmark-")
+    for i in range(count):
+        pixbuf = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, False, 8, 160, 90)
+        pixbuf.fill((i * 2654435761) & 0xffffff00 | 0xff)
+        pixbuf.savev(os.path.join(folder, f"Screenshot_{i:05d}.png"), "png", [], [])
+    return folder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000,
+                        help="images in the folder (default: 20000)")
+    parser.add_argument("--seconds", type=float, default=10,
+                        help="time to scroll from top to bottom (default: 10)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    # Keep the user's thumbnail cache out of it
+    cache = tempfile.mkdtemp(prefix="gallery-benchmark-cache-")
+    os.environ["XDG_CACHE_HOME"] = cache
+    tool = load_tool()
+    from gi.repository import Gtk
+
+    if not Gtk.init_check(sys.argv[:1])[0]:
+        sys.exit("No display available, run under xvfb-run")
+
+    def pump(seconds=0.0):
+        end = time.perf_counter() + seconds
+        while True:
+            while Gtk.events_pending():
+                Gtk.main_iteration_do(False)
+            if time.perf_counter() >= end:
+                break
+            time.sleep(0.002)
+
+    folder = make_folder(args.files)
+    try:
+        start = time.perf_counter()
+        gallery = tool.GalleryWindow(None, [folder])
+        gallery.show_all()
+        while len(gallery.store) < args.files:
+            pump()
+        list_ms = (time.perf_counter() - start) * 1000
+        pump(0.5)
+
+        frames = []
+        clock = gallery.get_frame_clock()
+        handler_id = clock.connect("after-paint",
+                                   lambda clock: frames.append(time.perf_counter()))
+        adjustment = gallery.tree_view.get_parent().get_vadjustment()
+        bottom = adjustment.get_upper() - adjustment.get_page_size()
+        start = time.perf_counter()
+        while True:
+            progress = (time.perf_counter() - start) / args.seconds
+            adjustment.set_value(bottom * min(1.0, progress))
+            pump(0.004)
+            if progress >= 1:
+                break
+        scroll_seconds = time.perf_counter() - start
+        clock.disconnect(handler_id)
+        pump(0.5)
+        gallery.destroy()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+        shutil.rmtree(cache, ignore_errors=True)
+
+    intervals = sorted((b - a) * 1000 for a, b in zip(frames, frames[1:]))
+    result = {
+        'files': args.files,
+        'list_ms': round(list_ms, 1),
+        'frames': len(frames),
+        'fps': round(len(frames) / scroll_seconds, 1),
+        'frame_ms_median': round(statistics.median(intervals), 2) if intervals else None,
+        'frame_ms_p95': round(intervals[int(len(intervals) * 0.95)], 2) if intervals else None,
+        'frame_ms_max': round(intervals[-1], 2) if intervals else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Synthetic capture samples shared by the encoder benchmarks
+
+Rendered with cairo, so no display is needed. screenshot.png from the repo is
+included as a real UI capture.
+"""
+
+import os
+import random
+
+import gi
+gi.require_version('Gdk', '3.0')
+from gi.repository import Gdk, GdkPixbuf
+import cairo
+
+from common import ROOT
+
+WIDTH = 1920
+HEIGHT = 1080
+
+
+def render(draw):
+    """Run draw(cr) on a WIDTHxHEIGHT surface and return it as a pixbuf"""
+    surface = cairo.ImageSurface(cairo.FORMAT_RGB24, WIDTH, HEIGHT)
+    draw(cairo.Context(surface))
+    surface.flush()
+    return Gdk.pixbuf_get_from_surface(surface, 0, 0, WIDTH, HEIGHT)
+
+
+def draw_terminal(cr):
+    """Dark background with lines of monospace log output"""
+    rng = random.Random(1)
+    cr.set_source_rgb(0.1, 0.1, 0.12)
+    cr.paint()
+    cr.select_font_face("Monospace", 0, 0)
+    cr.set_font_size(14)
+    colors = [(0.8, 0.8, 0.8), (0.4, 0.9, 0.4), (0.9, 0.8, 0.3), (0.9, 0.4, 0.4)]
+    for line in range(HEIGHT // 18):
+        cr.set_source_rgb(*rng.choice(colors))
+        cr.move_to(8, 18 * (line + 1))
+        length = rng.randint(10, 180)
+        cr.show_text("".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789 :/.-=[]")
+                             for _ in range(length)))
+
+
+def draw_ide(cr):
+    """Light editor with side bar, tabs and syntax-coloured code"""
+    rng = random.Random(2)
+    cr.set_source_rgb(0.98, 0.98, 0.98)
+    cr.paint()
+    cr.set_source_rgb(0.93, 0.93, 0.95)
+    cr.rectangle(0, 0, 280, HEIGHT)
+    cr.fill()
+    cr.set_source_rgb(0.85, 0.87, 0.9)
+    cr.rectangle(280, 0, WIDTH - 280, 36)
+    cr.fill()
+    cr.select_font_face("Monospace", 0, 0)
+    cr.set_font_size(13)
+    colors = [(0.1, 0.1, 0.1), (0.6, 0.1, 0.6), (0.1, 0.4, 0.8), (0.1, 0.5, 0.2)]
+    for line in range((HEIGHT - 40) // 19):
+        x = 300 + 28 * rng.randint(0, 4)
+        for _ in range(rng.randint(1, 6)):
+            cr.set_source_rgb(*rng.choice(colors))
+            word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz_")
+                           for _ in range(rng.randint(2, 12)))
+            cr.move_to(x, 56 + 19 * line)
+            cr.show_text(word)
+            x += cr.text_extents(word).x_advance + 8
+
+
+def draw_photo(cr):
+    """Smooth gradients with sensor-like noise"""
+    gradient = cairo.LinearGradient(0, 0, WIDTH, HEIGHT)
+    gradient.add_color_stop_rgb(0, 0.2, 0.4, 0.7)
+    gradient.add_color_stop_rgb(0.5, 0.8, 0.6, 0.3)
+    gradient.add_color_stop_rgb(1, 0.1, 0.3, 0.1)
+    cr.set_source(gradient)
+    cr.paint()
+    
+    noise_data = bytearray(random.Random(3).randbytes(WIDTH * HEIGHT * 4))
+    noise = cairo.ImageSurface.create_for_data(noise_data, cairo.FORMAT_RGB24,
+                                               WIDTH, HEIGHT, WIDTH * 4)
+    cr.set_source_surface(noise, 0, 0)
+    cr.paint_with_alpha(0.15)
+
+
+def load_samples():
+    """Return {name: pixbuf} for the benchmark corpus"""
+    samples = {
+        'terminal': render(draw_terminal),
+        'ide': render(draw_ide),
+        'photo': render(draw_photo),
+    }
+    readme_capture = os.path.join(ROOT, "screenshot.png")
+    if os.path.exists(readme_capture):
+        samples['readme-ui'] = GdkPixbuf.Pixbuf.new_from_file(readme_capture)
+    return samples
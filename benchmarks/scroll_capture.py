@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Scroll capture benchmark - Stitch a synthetic page scrolled in a real window and check it
+
+Needs a display; run under xvfb-run. A window shows a tall generated page,
+which is scrolled by random steps while the visible area is grabbed and fed
+to the stitcher, as a scrolling capture does. This is repeated for several
+seeds, and each stitched image must equal its page row for row.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from common import load_tool, peak_rss_mb
+
+
+def make_page(width, height, seed):
+    """Text-like page: lines of random "glyph" runs on a white background"""
+    rng = random.Random(seed)
+    white = b"\xff\xff\xff" * width
+    rows = []
+    while len(rows) < height:
+        # One text line: 12 rows of glyph spans, then 6 blank rows
+        spans = []
+        x = rng.randrange(8, 40)
+        while x < width - 20:
+            length = rng.randrange(4, 60)
+            spans.append((x, min(x + length, width)))
+            x += length + rng.randrange(4, 12)
+        for line_row in range(12):
+            row = bytearray(white)
+            for start, end in spans:
+                shade = rng.randrange(0, 120)
+                row[start * 3:end * 3] = bytes((shade, shade, shade + line_row)) * (end - start)
+            rows.append(bytes(row))
+        rows.extend([white] * 6)
+    return rows[:height]
+
+
+def stitch_page(tool, args, seed):
+    """Scroll a page made from seed in a window, stitch the grabs and compare"""
+    from gi.repository import Gtk, GLib, GdkPixbuf
+
+    rows = make_page(args.width, args.page, seed)
+    page = GdkPixbuf.Pixbuf.new_from_bytes(GLib.Bytes.new(b"".join(rows)),
+                                           GdkPixbuf.Colorspace.RGB, False, 8,
+                                           args.width, args.page, args.width * 3)
+
+    window = Gtk.Window()
+    window.set_decorated(False)
+    window.move(0, 0)
+    scrolled = Gtk.ScrolledWindow()
+    scrolled.set_policy(Gtk.PolicyType.EXTERNAL, Gtk.PolicyType.EXTERNAL)
+    scrolled.set_size_request(args.width, args.view)
+    scrolled.add(Gtk.Image.new_from_pixbuf(page))
+    scrolled.get_child().set_shadow_type(Gtk.ShadowType.NONE)
+    window.add(scrolled)
+    window.show_all()
+
+    def settle():
+        # Let the window redraw, the X server has it once the loop is idle
+        for _ in range(3):
+            while Gtk.events_pending():
+                Gtk.main_iteration()
+            time.sleep(0.02)
+
+    settle()
+    _, left, top = scrolled.get_window().get_origin()
+    adjustment = scrolled.get_vadjustment()
+    rng = random.Random(seed)
+
+    stitcher = tool.ScrollStitcher()
+    add_times = []
+    position = 0
+    while True:
+        settle()
+        frame = tool.grab_area(left, top, args.width, args.view)
+        start = time.perf_counter()
+        added = stitcher.add_frame(frame)
+        add_times.append((time.perf_counter() - start) * 1000)
+        if added is None:
+            print(f"Seed {seed}: lost track at position {position}")
+            break
+        if position >= args.page - args.view:
+            break
+        position = min(position + rng.choice([0, 1, 40, 120, args.view // 2]),
+                       args.page - args.view)
+        adjustment.set_value(position)
+    window.destroy()
+
+    stitcher.finish()
+    stitched = [bytes(row) for row in stitcher.spooled_rows()]
+    expected = rows[:position + args.view]
+    first_bad = next((i for i, (a, b) in enumerate(zip(stitched, expected)) if a != b),
+                     None if len(stitched) == len(expected) else min(len(stitched),
+                                                                     len(expected)))
+    output = tempfile.NamedTemporaryFile(suffix=".png")
+    start = time.perf_counter()
+    stitcher.save(output.name)
+    save_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        'seed': seed,
+        'frames': len(add_times),
+        'stitched_rows': stitcher.height,
+        'expected_rows': len(expected),
+        'identical': first_bad is None,
+        'first_bad_row': first_bad,
+        'median_add_frame_ms': round(statistics.median(add_times), 2),
+        'save_ms': round(save_ms, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--view", type=int, default=600, help="visible height (default: 600)")
+    parser.add_argument("--page", type=int, default=6000, help="page height (default: 6000)")
+    parser.add_argument("--seeds", default="1,2,3,4,5,6,7",
+                        help="comma-separated page and scroll seeds (default: 1,2,3,4,5,6,7)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    tool = load_tool()
+    from gi.repository import Gtk
+
+    if not Gtk.init_check(sys.argv[:1])[0]:
+        sys.exit("No display available, run under xvfb-run")
+
+    results = [stitch_page(tool, args, int(seed)) for seed in args.seeds.split(",")]
+    summary = {'results': results, 'peak_rss_mb': round(peak_rss_mb(), 1)}
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    sys.exit(0 if all(result['identical'] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark - Launches the tool repeatedly and reports import and first-map times
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from common import SCRIPT
+
+
+def run_once():
+    """Launch the tool once and return its timings in milliseconds"""
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, SCRIPT, "--startup-benchmark"],
+        check=True, capture_output=True, text=True
+    ).stdout
+    wall_ms = (time.perf_counter() - start) * 1000
+    
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = round(wall_ms, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--runs", type=int, default=10, help="number of launches (default: 10)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    
+    if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        sys.exit("No display available, run under xvfb-run")
+    
+    # First launch warms the disk cache and is not counted
+    run_once()
+    runs = [run_once() for _ in range(args.runs)]
+    
+    summary = {
+        key: round(statistics.median(run[key] for run in runs), 1)
+        for key in ('import_ms', 'first_map_ms', 'process_ms')
+    }
+    print(f"Median of {args.runs} runs: import {summary['import_ms']} ms, "
+          f"first map {summary['first_map_ms']} ms, "
+          f"process total {summary['process_ms']} ms")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'median': summary, 'runs': runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
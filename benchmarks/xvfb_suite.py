@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Xvfb benchmark suite - Grab, overlay redraw and save timings at several screen sizes
+
+Starts a private Xvfb server per screen configuration and measures, in a fresh
+process each time:
+  - grab time of a full monitor (the capture_full_screen path) and of all monitors
+  - time to write all monitors in parallel and one after another
+  - zero-delay capture latency: Capture clicked to the overlay drawn
+  - time from a capture to the crop overlay being drawn
+  - overlay redraw time while a selection is dragged with the real pointer
+  - crop-and-save time of an 800x600 region, and save time of the full capture
+  - peak memory
+Results are printed and written as JSON, to compare changes to the hot paths.
+Needs Xvfb (package xvfb) and the tool's own dependencies.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import load_tool, peak_rss_mb
+
+CONFIGS = {
+    '1080p': ["-screen", "0", "1920x1080x24"],
+    '4k': ["-screen", "0", "3840x2160x24"],
+    '8k': ["-screen", "0", "7680x4320x24"],
+    'dual': ["-screen", "0", "2560x1440x24", "-screen", "1", "1920x1080x24", "+xinerama"],
+}
+
+
+def start_xvfb(screen_args):
+    """Start Xvfb on a free display, return the process and the display name"""
+    read_fd, write_fd = os.pipe()
+    process = subprocess.Popen(["Xvfb", "-displayfd", str(write_fd), "-nolisten", "tcp",
+                                *screen_args], pass_fds=[write_fd],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        number = f.readline().strip()
+    if not number:
+        process.kill()
+        raise RuntimeError("Xvfb did not start")
+    return process, f":{number}"
+
+
+def median_ms(function, runs):
+    """Median wall time of runs calls of function, in ms"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 2)
+
+
+def measure(runs):
+    """Child process: run every measurement on the current display"""
+    trace_path = os.path.join(tempfile.mkdtemp(), "trace.json")
+    tool = load_tool()
+    tool.TRACE.start(trace_path)
+    from gi.repository import Gtk, Gdk
+
+    if not Gtk.init_check(sys.argv[:1])[0]:
+        sys.exit("Cannot open display")
+
+    def pump(seconds=0.0):
+        end = time.perf_counter() + seconds
+        while True:
+            while Gtk.events_pending():
+                Gtk.main_iteration_do(False)
+            if time.perf_counter() >= end:
+                break
+            time.sleep(0.002)
+
+    display = Gdk.Display.get_default()
+    monitors = tool.list_monitors(display)
+    geometry = monitors[0]['geometry']
+    result = {
+        'monitors': [f"{m['geometry'].width}x{m['geometry'].height}" for m in monitors],
+        'grab_ms': median_ms(lambda: tool.grab_monitor(geometry), runs),
+    }
+    if len(monitors) > 1:
+        result['grab_all_ms'] = median_ms(lambda: tool.grab_all_monitors(monitors), runs)
+        # Writing every monitor: in parallel, as --all-monitors does, and one after another
+        pixbufs, _ = tool.grab_all_monitors(monitors)
+        folder = tempfile.mkdtemp()
+        paths = [os.path.join(folder, f"monitor{i}.png") for i in range(len(pixbufs))]
+
+        def save_all_parallel():
+            with ThreadPoolExecutor(len(pixbufs)) as executor:
+                list(executor.map(tool.write_image, pixbufs, paths))
+        result['save_all_parallel_ms'] = median_ms(save_all_parallel, max(1, runs // 5))
+        result['save_all_sequential_ms'] = median_ms(
+            lambda: list(map(tool.write_image, pixbufs, paths)), max(1, runs // 5))
+
+    # Zero-delay capture from the main window: hide, grab, overlay drawn
+    window = tool.ScreenshotCropTool()
+    window.show_all()
+    pump(0.3)
+    window.delay_spin.set_value(0)
+    start = time.perf_counter()
+    window.on_capture(None)
+    while not window.crop_window:
+        pump()
+    overlay = window.crop_window
+    first_draw = {}
+
+    def on_drawn(widget, cr):
+        first_draw.setdefault('time', time.perf_counter())
+        return False
+    overlay.connect_after("draw", on_drawn)
+    while 'time' not in first_draw:
+        pump()
+    result['zero_delay_capture_ms'] = round((first_draw['time'] - start) * 1000, 1)
+    overlay.destroy()
+    pump(0.1)
+
+    # Overlay: from a fresh capture to the first complete draw
+    window.selected_monitor = monitors[0]
+    start = time.perf_counter()
+    window.captured_pixbuf = tool.grab_monitor(geometry)
+    window.show_crop_interface()
+    overlay = window.crop_window
+    first_draw.clear()
+    overlay.connect_after("draw", on_drawn)
+    while 'time' not in first_draw:
+        pump()
+    result['capture_to_overlay_ms'] = round((first_draw['time'] - start) * 1000, 1)
+    pump(0.1)
+
+    # Drag a selection with the real pointer, one step every 8 ms
+    pointer = display.get_default_seat().get_pointer()
+    screen = Gdk.Screen.get_default()
+    x0, y0 = geometry.x + geometry.width // 8, geometry.y + geometry.height // 8
+    pointer.warp(screen, x0, y0)
+    pump(0.05)
+    drag_start = time.perf_counter()
+    Gdk.test_simulate_button(overlay.get_window(), x0 - geometry.x, y0 - geometry.y, 1,
+                             Gdk.ModifierType(0), Gdk.EventType.BUTTON_PRESS)
+    steps = 150
+    for i in range(1, steps + 1):
+        pointer.warp(screen, x0 + i * geometry.width // (2 * steps),
+                     y0 + i * geometry.height // (2 * steps))
+        pump(0.008)
+    Gdk.test_simulate_button(overlay.get_window(), x0 - geometry.x + geometry.width // 2,
+                             y0 - geometry.y + geometry.height // 2, 1,
+                             Gdk.ModifierType(0), Gdk.EventType.BUTTON_RELEASE)
+    pump(0.1)
+    drag_seconds = time.perf_counter() - drag_start - 0.1
+
+    # Crop and save, as Enter in the overlay does, then the full capture
+    output = os.path.join(tempfile.mkdtemp(), "shot.png")
+    capture = window.captured_pixbuf
+    result['crop_save_ms'] = median_ms(
+        lambda: tool.write_image(tool.crop_pixbuf(capture, 100, 100, 800, 600), output), runs)
+    result['full_save_ms'] = median_ms(lambda: tool.write_image(capture, output),
+                                       max(1, runs // 5))
+    overlay.destroy()
+    pump()
+
+    tool.TRACE.close()
+    with open(trace_path) as f:
+        events = json.load(f)
+    draws = sorted(event['dur'] / 1000 for event in events
+                   if event['name'] == "draw overlay" and event['args'].get('dragging'))
+    if draws:
+        result['drag_frames'] = len(draws)
+        result['drag_fps'] = round(len(draws) / drag_seconds, 1)
+        result['draw_ms_median'] = round(statistics.median(draws), 3)
+        result['draw_ms_p95'] = round(draws[int(len(draws) * 0.95)], 3)
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--configs", default=",".join(CONFIGS),
+                        help=f"comma-separated screen setups (default: {','.join(CONFIGS)})")
+    parser.add_argument("--runs", type=int, default=10, help="repetitions per timing (default: 10)")
+    parser.add_argument("--output", default="benchmark-results.json",
+                        help="JSON results file (default: benchmark-results.json)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.runs)))
+        return
+
+    results = {}
+    for name in args.configs.split(","):
+        if name not in CONFIGS:
+            sys.exit(f"Unknown configuration {name}, choose from {', '.join(CONFIGS)}")
+        server, display = start_xvfb(CONFIGS[name])
+        home = tempfile.mkdtemp()  # Keep the user's config and caches out of it
+        env = dict(os.environ, DISPLAY=display, HOME=home,
+                   XDG_CONFIG_HOME=os.path.join(home, ".config"),
+                   XDG_CACHE_HOME=os.path.join(home, ".cache"),
+                   GDK_BACKEND="x11")
+        env.pop("WAYLAND_DISPLAY", None)
+        try:
+            output = subprocess.run([sys.executable, __file__, "--child", "--runs",
+                                     str(args.runs)], env=env, check=True,
+                                    capture_output=True, text=True).stdout
+            results[name] = json.loads(output.strip().splitlines()[-1])
+        except subprocess.CalledProcessError as e:
+            results[name] = {'error': e.stderr.strip().splitlines()[-1:]}
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{name}: {json.dumps(results[name])}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'python': sys.version.split()[0], 'runs': args.runs,
+                   'time': time.strftime("%Y-%m-%dT%H:%M:%S"), 'results': results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,8 @@ mkdir -p "${BUILD_DIR}/usr/share/doc/${PACKAGE_NAME}"
 # Copy the main script
 cp screenshot-crop.py "${BUILD_DIR}/usr/bin/screenshot-crop"
 chmod 755 "${BUILD_DIR}/usr/bin/screenshot-crop"
+cp screenshot-crop-client.py "${BUILD_DIR}/usr/bin/screenshot-crop-client"
+chmod 755 "${BUILD_DIR}/usr/bin/screenshot-crop-client"
 
 # Create control file
 cat > "${BUILD_DIR}/DEBIAN/control" << EOF
@@ -38,7 +40,7 @@ Version: ${VERSION}
 Section: graphics
 Priority: optional
 Architecture: ${ARCH}
-Depends: python3 (>= 3.8), python3-gi, python3-gi-cairo, gir1.2-gtk-3.0, gir1.2-gdk-3.0
+Depends: python3 (>= 3.8), python3-gi, python3-gi-cairo, python3-cairo, gir1.2-gtk-3.0, gir1.2-gdk-3.0
 Maintainer: ${MAINTAINER}
 Description: ${DESCRIPTION}
  Screenshot Crop Tool is a modern screenshot utility for Linux with:
@@ -117,6 +119,7 @@ EOF
 find "${BUILD_DIR}" -type d -exec chmod 755 {} \;
 find "${BUILD_DIR}" -type f -exec chmod 644 {} \;
 chmod 755 "${BUILD_DIR}/usr/bin/screenshot-crop"
+chmod 755 "${BUILD_DIR}/usr/bin/screenshot-crop-client"
 
 # Build the package
 echo -e "${YELLOW}Building .deb package...${NC}"
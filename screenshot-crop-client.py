@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Screenshot Crop Client - Sends commands to a running `screenshot-crop --daemon`
+
+Deliberately imports nothing but the standard library, so a hotkey pays only
+for starting Python, not for loading GTK.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+
+
+def remote_socket_path():
+    """Path of the Unix socket the daemon listens on"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "screenshot-crop.sock")
+    return f"/tmp/screenshot-crop-{os.getuid()}.sock"
+
+
+def parse_region(text):
+    """Parse an x,y,width,height region argument"""
+    try:
+        values = [int(v) for v in text.split(",")]
+    except ValueError:
+        values = []
+    if len(values) != 4 or values[2] <= 0 or values[3] <= 0:
+        raise argparse.ArgumentTypeError("region must be x,y,width,height")
+    return values
+
+
+def send_command(request, timeout=30):
+    """Send one request to the daemon and return its reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(timeout)
+        conn.connect(remote_socket_path())
+        conn.sendall(json.dumps(request).encode() + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Control a running screenshot-crop --daemon")
+    parser.add_argument("command", choices=["overlay", "capture", "show", "quit"],
+                        help="overlay: capture and open the crop overlay; "
+                             "capture: save straight to --output; "
+                             "show: open the main window; quit: stop the daemon")
+    parser.add_argument("--monitor", type=int, default=1, metavar="N",
+                        help="monitor to capture, as numbered by Identify (default: 1)")
+    parser.add_argument("--region", type=parse_region, metavar="X,Y,W,H",
+                        help="area to keep, relative to the monitor")
+    parser.add_argument("--output", metavar="PATH",
+                        help="file to write the capture to")
+    parser.add_argument("--delay", type=float, default=0, metavar="SECONDS",
+                        help="wait before capturing (default: 0)")
+    args = parser.parse_args()
+    
+    if args.command == "capture" and not args.output:
+        parser.error("capture requires --output")
+    
+    request = {
+        'command': args.command,
+        'monitor': args.monitor,
+        'region': args.region,
+        'delay': args.delay
+    }
+    if args.output:
+        # The daemon does not share our working directory
+        request['output'] = os.path.abspath(args.output)
+    
+    try:
+        reply = send_command(request, timeout=30 + args.delay)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print("screenshot-crop daemon is not running, start it with: "
+              "screenshot-crop --daemon", file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"Could not talk to the daemon: {e}", file=sys.stderr)
+        return 1
+    
+    if not reply.get('ok'):
+        print(reply.get('error', "Command failed"), file=sys.stderr)
+        return 1
+    if reply.get('output'):
+        print(reply['output'])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,11 @@
 Screenshot with Post-Capture Crop - Captures screen after delay, then lets you crop
 """
 
+import time
+START_TIME = time.perf_counter()
+
+# Only what the main window needs is imported here; everything else, from
+# cairo and the worker pool to socket and zlib, is imported where it is used
 import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('Gdk', '3.0')
@@ -10,8 +15,1379 @@ from gi.repository import Gtk, Gdk, GLib, GdkPixbuf
 import os
 import sys
 import json
+import atexit
 from datetime import datetime
 
+# Set SCREENSHOT_CROP_STATS=1 to print crop overlay redraw statistics
+SHOW_STATS = bool(os.environ.get("SCREENSHOT_CROP_STATS"))
+
+
+class Tracer:
+    """Timing trace in the Chrome trace event format, off unless started.
+    
+    The file is a JSON array of events that chrome://tracing and Perfetto
+    open directly; it stays loadable even if the process dies before close()
+    writes the closing bracket. Timestamps are GLib monotonic microseconds,
+    the clock the rest of the tool uses. Safe to call from any thread.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.file = None
+        self.lock = None  # Created by start(), a disabled tracer needs no threading
+        self.separator = "[\n"
+
+    def start(self, path):
+        import threading
+        self.lock = threading.Lock()
+        self.get_ident = threading.get_ident
+        self.file = open(path, "w")
+        self.enabled = True
+        self.instant("trace started", argv=sys.argv[1:])
+        atexit.register(self.close)
+
+    def close(self):
+        if self.lock is None:
+            return
+        with self.lock:
+            if self.file:
+                self.file.write("\n]\n")
+                self.file.close()
+                self.file = None
+                self.enabled = False
+
+    def write(self, event):
+        event['pid'] = os.getpid()
+        event['tid'] = self.get_ident()
+        line = json.dumps(event, separators=(",", ":"), default=str)
+        with self.lock:
+            if self.file:
+                self.file.write(self.separator + line)
+                self.separator = ",\n"
+
+    def instant(self, name, **args):
+        """A point in time, e.g. a request or a summary of statistics"""
+        if self.enabled:
+            self.write({'name': name, 'ph': "i", 's': "t",
+                        'ts': GLib.get_monotonic_time(), 'args': args})
+
+    def complete(self, name, start, **args):
+        """A stage that began at start (GLib.get_monotonic_time()) and ends now"""
+        if self.enabled:
+            now = GLib.get_monotonic_time()
+            self.write({'name': name, 'ph': "X", 'ts': start, 'dur': now - start,
+                        'args': args})
+
+    def span(self, name, **args):
+        """Context manager tracing the enclosed block"""
+        if not self.enabled:
+            return NULL_SPAN
+        return TraceSpan(self, name, args)
+
+
+class TraceSpan:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = GLib.get_monotonic_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.complete(self.name, self.start, **self.args)
+        return False
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+TRACE = Tracer()
+if os.environ.get("SCREENSHOT_CROP_TRACE"):
+    TRACE.start(os.environ["SCREENSHOT_CROP_TRACE"])
+
+
+def list_monitors(display):
+    """Describe the monitors of display, in GDK order"""
+    monitors = []
+    primary = display.get_primary_monitor()
+    for i in range(display.get_n_monitors()):
+        monitor = display.get_monitor(i)
+        monitors.append({
+            'index': i,
+            'geometry': monitor.get_geometry(),
+            'monitor': monitor,
+            'model': monitor.get_model() or f"Display {i+1}",
+            'is_primary': monitor == primary
+        })
+    return monitors
+
+
+class GdkCapture:
+    """Grab through GDK, works wherever GDK can read the root window"""
+    name = "gdk"
+    
+    def grab(self, x, y, width, height):
+        root_window = Gdk.Screen.get_default().get_root_window()
+        return Gdk.pixbuf_get_from_window(root_window, x, y, width, height)
+
+
+class XlibCapture:
+    """Grab with XGetImage on a private X connection, X11 only.
+    
+    The image is transferred straight into an RGB pixbuf, without going
+    through a cairo surface as gdk_pixbuf_get_from_window does.
+    """
+    name = "xlib"
+    
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        
+        class XImage(ctypes.Structure):
+            # Leading fields of XImage, only read through pointers
+            _fields_ = [
+                ('width', ctypes.c_int), ('height', ctypes.c_int),
+                ('xoffset', ctypes.c_int), ('format', ctypes.c_int),
+                ('data', ctypes.c_void_p), ('byte_order', ctypes.c_int),
+                ('bitmap_unit', ctypes.c_int), ('bitmap_bit_order', ctypes.c_int),
+                ('bitmap_pad', ctypes.c_int), ('depth', ctypes.c_int),
+                ('bytes_per_line', ctypes.c_int), ('bits_per_pixel', ctypes.c_int),
+                ('red_mask', ctypes.c_ulong), ('green_mask', ctypes.c_ulong),
+                ('blue_mask', ctypes.c_ulong),
+            ]
+        
+        library = ctypes.util.find_library("X11")
+        if not library:
+            raise CaptureError("libX11 not found")
+        xlib = ctypes.cdll.LoadLibrary(library)
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xlib.XGetImage.restype = ctypes.POINTER(XImage)
+        xlib.XGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_int,
+                                   ctypes.c_uint, ctypes.c_uint, ctypes.c_ulong, ctypes.c_int]
+        xlib.XDestroyImage.argtypes = [ctypes.POINTER(XImage)]
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        
+        display = xlib.XOpenDisplay(None)
+        if not display:
+            raise CaptureError("Cannot open X display")
+        self.ctypes = ctypes
+        self.xlib = xlib
+        self.display = display
+        self.root = xlib.XDefaultRootWindow(display)
+    
+    def grab(self, x, y, width, height):
+        # X works in device pixels, GDK coordinates are scaled on HiDPI
+        root_window = Gdk.Screen.get_default().get_root_window()
+        scale = root_window.get_scale_factor()
+        x, y, width, height = x * scale, y * scale, width * scale, height * scale
+        # An area outside the root window is a fatal X error, clamp it first.
+        # GDK keeps the root size current across xrandr changes.
+        x, y = max(0, x), max(0, y)
+        width = min(width, root_window.get_width() * scale - x)
+        height = min(height, root_window.get_height() * scale - y)
+        if width <= 0 or height <= 0:
+            return None
+        
+        all_planes = 0xffffffff
+        z_pixmap = 2
+        image = self.xlib.XGetImage(self.display, self.root, x, y, width, height,
+                                    all_planes, z_pixmap)
+        if not image:
+            return None
+        try:
+            info = image.contents
+            if info.bits_per_pixel != 32 or info.red_mask != 0xff0000 or info.byte_order != 0:
+                raise CaptureError("Unsupported X visual, use the gdk backend")
+            stride = info.bytes_per_line
+            raw = self.ctypes.string_at(info.data, stride * height)
+        finally:
+            # Frees the pixel data along with the structure
+            self.xlib.XDestroyImage(image)
+        
+        if stride != width * 4:
+            raw = b"".join(raw[row * stride:row * stride + width * 4] for row in range(height))
+        # BGRX to RGB with three strided copies
+        rgb = bytearray(width * height * 3)
+        rgb[0::3] = raw[2::4]
+        rgb[1::3] = raw[1::4]
+        rgb[2::3] = raw[0::4]
+        return GdkPixbuf.Pixbuf.new_from_bytes(GLib.Bytes.new(rgb), GdkPixbuf.Colorspace.RGB,
+                                               False, 8, width, height, width * 3)
+    
+    def close(self):
+        self.xlib.XCloseDisplay(self.display)
+
+
+CAPTURE_BACKENDS = {backend.name: backend for backend in (GdkCapture, XlibCapture)}
+capture_backend = {'name': 'gdk', 'instance': None}  # Opened by the first grab
+
+
+def set_capture_backend(name):
+    """Use the named backend for all grabs; raises CaptureError if it is unavailable"""
+    if name not in CAPTURE_BACKENDS:
+        raise CaptureError(f"Unknown capture backend: {name}")
+    current = capture_backend['instance']
+    if current and current.name == name:
+        return
+    backend = CAPTURE_BACKENDS[name]()
+    if hasattr(current, 'close'):
+        current.close()
+    capture_backend.update(name=name, instance=backend)
+
+
+def prefer_capture_backend(name):
+    """Use the named backend once the first grab opens one, unless one is open already"""
+    if capture_backend['instance'] is None:
+        capture_backend['name'] = name
+
+
+def current_capture_backend():
+    """The backend for the next grab, opened on first use"""
+    if capture_backend['instance'] is None:
+        try:
+            set_capture_backend(capture_backend['name'])
+        except CaptureError as e:
+            print(f"{e}, using the gdk capture backend")
+            set_capture_backend('gdk')
+    return capture_backend['instance']
+
+
+def grab_area(x, y, width, height):
+    """Capture an area of the root window with the current backend"""
+    backend = current_capture_backend()
+    with TRACE.span("grab", backend=backend.name, x=x, y=y, width=width, height=height):
+        return backend.grab(x, y, width, height)
+
+
+def grab_monitor(geometry):
+    """Capture the area of the root window covered by geometry"""
+    return grab_area(geometry.x, geometry.y, geometry.width, geometry.height)
+
+
+def monitor_key(geometry):
+    """Config key of a monitor geometry, saved regions only apply to the same one"""
+    return f"{geometry.width}x{geometry.height}+{geometry.x}+{geometry.y}"
+
+
+def clamp_region(region, geometry):
+    """region (x, y, width, height relative to the monitor) kept on the monitor, or None"""
+    x, y, width, height = (int(v) for v in region)
+    x = max(0, min(x, geometry.width))
+    y = max(0, min(y, geometry.height))
+    width = min(width, geometry.width - x)
+    height = min(height, geometry.height - y)
+    if width <= 0 or height <= 0:
+        return None
+    return [x, y, width, height]
+
+
+def grab_all_monitors(monitors):
+    """Grab every monitor with as little time skew between them as possible.
+    
+    When the monitors fill most of their bounding box, the whole desktop is
+    grabbed in one request and split into views, so there is no skew at all.
+    Otherwise the monitors are grabbed back to back. Returns the pixbufs (None
+    for a failed grab) and the skew between the first and last grab in ms.
+    """
+    geometries = [info['geometry'] for info in monitors]
+    left = min(g.x for g in geometries)
+    top = min(g.y for g in geometries)
+    width = max(g.x + g.width for g in geometries) - left
+    height = max(g.y + g.height for g in geometries) - top
+    covered = sum(g.width * g.height for g in geometries)
+    current_capture_backend()  # Opening it must not count as skew
+    
+    if width * height <= covered * 1.25:
+        desktop = grab_area(left, top, width, height)
+        if desktop:
+            # The pixbuf is in device pixels on scaled displays
+            scale = desktop.get_width() / width
+            return [desktop.new_subpixbuf(round((g.x - left) * scale),
+                                          round((g.y - top) * scale),
+                                          round(g.width * scale),
+                                          round(g.height * scale))
+                    for g in geometries], 0.0
+    
+    pixbufs = []
+    grab_times = []
+    for geometry in geometries:
+        grab_times.append(time.perf_counter())
+        pixbufs.append(grab_monitor(geometry))
+    return pixbufs, (grab_times[-1] - grab_times[0]) * 1000
+
+
+def monitor_output_paths(filepath, count):
+    """Derive one file name per monitor from filepath"""
+    base, ext = os.path.splitext(filepath)
+    return [f"{base}-monitor{i + 1}{ext}" for i in range(count)]
+
+
+def crop_pixbuf(pixbuf, x, y, width, height):
+    """Return a view of the given area of pixbuf, clamped to its bounds, or None"""
+    pixbuf_width = pixbuf.get_width()
+    pixbuf_height = pixbuf.get_height()
+    
+    # Clamp values to pixbuf dimensions
+    x = max(0, min(x, pixbuf_width - 1))
+    y = max(0, min(y, pixbuf_height - 1))
+    width = min(width, pixbuf_width - x)
+    height = min(height, pixbuf_height - y)
+    
+    if width <= 0 or height <= 0:
+        return None
+    return pixbuf.new_subpixbuf(x, y, width, height)
+
+
+DEFAULT_FILENAME_TEMPLATE = "Screenshot_{date}_{time}"
+
+
+def create_unique_file(folder, template, fields, extension, seq=1):
+    """Claim a new, empty file named after template and return (path, seq).
+    
+    Names are taken with O_CREAT | O_EXCL, so collisions are resolved by the
+    filesystem without listing the folder, even against another instance.
+    On a collision {seq} is incremented, or -2, -3... appended if the
+    template has no {seq}. A bad template raises KeyError or ValueError.
+    """
+    uses_seq = "{seq" in template
+    for attempt in range(10000):
+        name = template.format(seq=seq, **fields).replace(os.sep, "-")
+        if attempt and not uses_seq:
+            name += f"-{attempt + 1}"
+        path = os.path.join(folder, name + extension)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+            return path, seq
+        except FileExistsError:
+            if uses_seq:
+                seq += 1
+    raise OSError(f"No free file name for {template} in {folder}")
+
+
+def remove_placeholder(filepath):
+    """Remove a file claimed by create_unique_file that was never written"""
+    try:
+        if os.path.getsize(filepath) == 0:
+            os.remove(filepath)
+    except OSError:
+        pass
+
+
+class CaptureError(Exception):
+    """Raised when a command line or remote capture cannot be completed"""
+
+
+def capture_all_to_files(monitors, output):
+    """Grab all monitors and encode them in parallel; returns paths, skew and wall time.
+    
+    write_image encodes in gdk-pixbuf, which runs without the GIL, so the
+    threads use one core each.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    start = time.perf_counter()
+    pixbufs, skew_ms = grab_all_monitors(monitors)
+    if not all(pixbufs):
+        raise CaptureError("Failed to capture screen")
+    
+    paths = monitor_output_paths(output, len(pixbufs))
+    try:
+        with ThreadPoolExecutor(max_workers=len(pixbufs)) as executor:
+            list(executor.map(write_image, pixbufs, paths))
+    except Exception as e:
+        raise CaptureError(f"Error saving screenshot: {str(e)}")
+    return paths, skew_ms, (time.perf_counter() - start) * 1000
+
+
+def capture_to_file(monitors, number, region, output):
+    """Grab monitor number (1-based), or only region of it, and write it to output"""
+    pixbuf = grab_monitor_area(monitors, number, region)
+    try:
+        write_image(pixbuf, output)
+    except Exception as e:
+        raise CaptureError(f"Error saving screenshot: {str(e)}")
+
+
+def grab_monitor_area(monitors, number, region):
+    """Grab monitor number (1-based), or only region of it, relative to the monitor"""
+    if not 1 <= number <= len(monitors):
+        raise CaptureError(f"Monitor {number} does not exist ({len(monitors)} found)")
+    
+    geometry = monitors[number - 1]['geometry']
+    if region:
+        # Only the region is requested from the X server
+        region = clamp_region(region, geometry)
+        if not region:
+            raise CaptureError("Invalid selection area")
+        x, y, width, height = region
+        pixbuf = grab_area(geometry.x + x, geometry.y + y, width, height)
+    else:
+        pixbuf = grab_monitor(geometry)
+    if not pixbuf:
+        raise CaptureError("Failed to capture screen")
+    return pixbuf
+
+
+def scroll_capture_to_file(monitors, number, region, output, interval=0.1, idle_timeout=2.0):
+    """Grab region of a monitor repeatedly while it is scrolled and stitch it to output.
+    
+    Stops once nothing has moved for idle_timeout seconds (five times as long
+    before the first scroll), when the content jumped too far to match, or at
+    the stitcher's maximum height. Returns the height of the image.
+    """
+    if not 1 <= number <= len(monitors):
+        raise CaptureError(f"Monitor {number} does not exist ({len(monitors)} found)")
+    geometry = monitors[number - 1]['geometry']
+    region = clamp_region(region, geometry)
+    if not region:
+        raise CaptureError("Invalid selection area")
+    x, y, width, height = region
+    
+    stitcher = ScrollStitcher()
+    moved = False
+    last_change = time.monotonic()
+    while not stitcher.full():
+        pixbuf = grab_area(geometry.x + x, geometry.y + y, width, height)
+        if not pixbuf:
+            raise CaptureError("Failed to capture screen")
+        added = stitcher.add_frame(pixbuf)
+        if added is None:
+            print("Scrolled too far to match, stopping", file=sys.stderr)
+            break
+        if added:
+            moved = moved or stitcher.height > 0
+            last_change = time.monotonic()
+        elif time.monotonic() - last_change > (idle_timeout if moved else idle_timeout * 5):
+            break
+        time.sleep(interval)
+    
+    try:
+        stitcher.save(output)
+    except Exception as e:
+        raise CaptureError(f"Error saving screenshot: {str(e)}")
+    return stitcher.height
+
+
+def remote_socket_path():
+    """Path of the Unix socket the daemon listens on"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "screenshot-crop.sock")
+    return f"/tmp/screenshot-crop-{os.getuid()}.sock"
+
+
+def build_backdrop_surfaces(pixbuf, scale=1):
+    """Render pixbuf into a bright and a pre-darkened cairo surface.
+    
+    scale is the number of pixbuf pixels per logical pixel of the overlay;
+    the surfaces carry it as their device scale, so they paint at logical size.
+    """
+    with TRACE.span("backdrop surfaces", width=pixbuf.get_width(), height=pixbuf.get_height()):
+        return render_backdrop_surfaces(pixbuf, scale)
+
+
+def render_backdrop_surfaces(pixbuf, scale):
+    import cairo
+    
+    width = pixbuf.get_width()
+    height = pixbuf.get_height()
+    
+    bright = cairo.ImageSurface(cairo.FORMAT_RGB24, width, height)
+    cr = cairo.Context(bright)
+    Gdk.cairo_set_source_pixbuf(cr, pixbuf, 0, 0)
+    cr.paint()
+    
+    dimmed = cairo.ImageSurface(cairo.FORMAT_RGB24, width, height)
+    cr = cairo.Context(dimmed)
+    cr.set_source_surface(bright, 0, 0)
+    cr.paint()
+    cr.set_source_rgba(0, 0, 0, 0.3)
+    cr.paint()
+    
+    if scale != 1:
+        bright.set_device_scale(scale, scale)
+        dimmed.set_device_scale(scale, scale)
+    return bright, dimmed
+
+
+def build_preview_pyramid(pixbuf, min_width):
+    """Halve pixbuf repeatedly while at least min_width wide: [full, 1/2, 1/4, ...]"""
+    levels = [pixbuf]
+    while levels[-1].get_width() // 2 >= min_width:
+        top = levels[-1]
+        # TILES averages each 2x2 block, which keeps thin UI lines visible
+        levels.append(top.scale_simple(top.get_width() // 2, top.get_height() // 2,
+                                       GdkPixbuf.InterpType.TILES))
+    return levels
+
+
+def preview_from_pyramid(levels, width, height):
+    """Resample the smallest level at least width wide to exactly width x height"""
+    level = next((level for level in reversed(levels) if level.get_width() >= width), levels[0])
+    if level.get_width() == width and level.get_height() == height:
+        return level
+    return level.scale_simple(width, height, GdkPixbuf.InterpType.BILINEAR)
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Output formats we know how to name and filter; availability of jpeg and
+# webp depends on the installed gdk-pixbuf loaders
+IMAGE_FORMATS = {
+    'png': {'label': "PNG images", 'mime': "image/png", 'extensions': ['.png']},
+    'jpeg': {'label': "JPEG images", 'mime': "image/jpeg", 'extensions': ['.jpg', '.jpeg']},
+    'webp': {'label': "WebP images", 'mime': "image/webp", 'extensions': ['.webp']},
+}
+
+# Encoder settings, stored under the same keys in the config file
+DEFAULT_ENCODER_SETTINGS = {
+    'output_format': 'png',
+    'png_compression': 6,  # 0 = fastest, 9 = smallest
+    'jpeg_quality': 90,
+    'webp_quality': 90
+}
+
+# Choices offered in the main window: (id, label, settings they apply)
+ENCODER_PRESETS = [
+    ('png-fast', "PNG (fast)", {'output_format': 'png', 'png_compression': 1}),
+    ('png', "PNG", {'output_format': 'png', 'png_compression': 6}),
+    ('png-compact', "PNG (compact)", {'output_format': 'png', 'png_compression': 9}),
+    ('jpeg', "JPEG", {'output_format': 'jpeg'}),
+    ('webp', "WebP", {'output_format': 'webp'}),
+]
+
+
+def writable_formats():
+    """Names of the IMAGE_FORMATS the installed gdk-pixbuf loaders can save"""
+    names = {fmt.get_name() for fmt in GdkPixbuf.Pixbuf.get_formats() if fmt.is_writable()}
+    return [name for name in IMAGE_FORMATS if name in names]
+
+
+def format_for_path(filepath, default=None):
+    """Output format implied by the extension of filepath"""
+    ext = os.path.splitext(filepath)[1].lower()
+    for name, info in IMAGE_FORMATS.items():
+        if ext in info['extensions']:
+            return name
+    return default
+
+
+def unwritable_format_error(image_format):
+    """Message for a format no installed loader can save, or None if it can be saved"""
+    # PNG has its own encoder
+    if image_format == "png" or image_format in writable_formats():
+        return None
+    hint = " (install webp-pixbuf-loader)" if image_format == "webp" else ""
+    return (f"{IMAGE_FORMATS[image_format]['label']} cannot be saved: no gdk-pixbuf "
+            f"loader for it is installed{hint}. Save as PNG instead.")
+
+
+def preset_for_settings(settings):
+    """Id of the ENCODER_PRESETS entry closest to settings"""
+    if settings['output_format'] != 'png':
+        return settings['output_format']
+    if settings['png_compression'] <= 3:
+        return 'png-fast'
+    if settings['png_compression'] >= 8:
+        return 'png-compact'
+    return 'png'
+
+
+def pixbuf_rows(pixbuf, band_rows=64):
+    """Yield the rows of pixbuf as memoryviews into its strided pixel buffer.
+
+    PyGObject copies on get_pixels(), so the buffer is read one band of rows
+    at a time through subpixbuf views. A crop of a huge capture therefore
+    never duplicates more than band_rows rows of the parent.
+    """
+    width = pixbuf.get_width()
+    height = pixbuf.get_height()
+    stride = pixbuf.get_rowstride()
+    row_bytes = width * pixbuf.get_n_channels()
+    
+    for top in range(0, height, band_rows):
+        rows = min(band_rows, height - top)
+        band = memoryview(pixbuf.new_subpixbuf(0, top, width, rows).get_pixels())
+        for i in range(rows):
+            yield band[i * stride:i * stride + row_bytes]
+
+
+def byte_masks(row_bytes):
+    """High-bit and low-bits masks covering row_bytes bytes, for SWAR arithmetic"""
+    high = int.from_bytes(b"\x80" * row_bytes, "big")
+    low = int.from_bytes(b"\x7f" * row_bytes, "big")
+    return high, low
+
+
+def swar_subtract(x, y, high, low):
+    """Bytewise (x - y) mod 256 of two rows packed as big integers.
+    
+    The high bit of every byte is handled separately so no borrow crosses
+    from one byte into the next.
+    """
+    return ((x | high) - (y & low)) ^ ((x ^ ~y) & high)
+
+
+def filter_rows_up(rows, row_bytes):
+    """Apply the PNG Up filter, yielding (filter type, filtered row) pairs"""
+    high, low = byte_masks(row_bytes)
+    previous = None
+    for row in rows:
+        current = int.from_bytes(row, "big")
+        if previous is None:
+            yield 0, row
+        else:
+            up = swar_subtract(current, previous, high, low)
+            yield 2, up.to_bytes(row_bytes, "big")
+        previous = current
+
+
+def write_png_chunk(f, chunk_type, data):
+    """Write one length-prefixed, CRC-suffixed PNG chunk"""
+    import struct
+    import zlib
+    f.write(struct.pack(">I", len(data)))
+    f.write(chunk_type)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+def write_png(filepath, pixbuf, level=6):
+    """Encode an 8-bit RGB(A) pixbuf as PNG from its rows, read a band at a time"""
+    channels = pixbuf.get_n_channels()
+    color_type = 6 if pixbuf.get_has_alpha() else 2
+    scanlines = filter_rows_up(pixbuf_rows(pixbuf), pixbuf.get_width() * channels)
+    write_png_scanlines(filepath, pixbuf.get_width(), pixbuf.get_height(), color_type,
+                        scanlines, level)
+
+
+def write_png_scanlines(filepath, width, height, color_type, scanlines_in, level=6, chunks=()):
+    """Write a PNG from (filter type, data) scanlines, compressing them as they come.
+    
+    chunks are (type, data) pairs written between IHDR and the image data.
+    """
+    import struct
+    import zlib
+    
+    compressor = zlib.compressobj(level)
+    with open(filepath, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        write_png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8,
+                                                 color_type, 0, 0, 0))
+        for chunk_type, data in chunks:
+            write_png_chunk(f, chunk_type, data)
+        
+        # Scanlines are compressed and flushed in slices to bound memory use
+        scanlines = bytearray()
+        compressed = bytearray()
+        for filter_type, data in scanlines_in:
+            scanlines.append(filter_type)
+            scanlines += data
+            if len(scanlines) >= 1 << 20:
+                compressed += compressor.compress(scanlines)
+                scanlines.clear()
+                if len(compressed) >= 1 << 16:
+                    write_png_chunk(f, b"IDAT", bytes(compressed))
+                    compressed.clear()
+        compressed += compressor.compress(scanlines)
+        compressed += compressor.flush()
+        write_png_chunk(f, b"IDAT", bytes(compressed))
+        write_png_chunk(f, b"IEND", b"")
+
+
+def write_image(pixbuf, filepath, settings=None):
+    """Encode pixbuf and write it to filepath.
+    
+    The format follows the file extension, or settings['output_format'] when
+    the extension is unknown.
+    """
+    settings = dict(DEFAULT_ENCODER_SETTINGS, **(settings or {}))
+    image_format = format_for_path(filepath, settings['output_format'])
+    error = unwritable_format_error(image_format)
+    if error:
+        raise ValueError(error)
+    
+    # Write to a temporary name so a half-written file is never visible
+    tmp_path = filepath + ".part"
+    span = TRACE.span("encode and write", format=image_format, file=os.path.basename(filepath),
+                      width=pixbuf.get_width(), height=pixbuf.get_height())
+    try:
+        with span:
+            if image_format == "png":
+                # libpng reads the rows of a subpixbuf view in place, so a crop
+                # is not copied, and the encoding runs without the GIL
+                pixbuf.savev(tmp_path, "png", ["compression"],
+                             [str(settings['png_compression'])])
+            else:
+                quality = settings.get(f"{image_format}_quality")
+                if quality is None:
+                    pixbuf.savev(tmp_path, image_format, [], [])
+                else:
+                    pixbuf.savev(tmp_path, image_format, ["quality"], [str(quality)])
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def find_scroll_offset(previous, current, min_overlap=16, min_match=0.9):
+    """Rows the content moved up between two frames, from their row hashes.
+    
+    Rows that occur once in both frames vote for an offset; the best voted
+    offsets are checked against the whole overlap, which must match for at
+    least min_match of its rows. Returns 0 when nothing moved and None when
+    no offset fits (scrolled too far, or content without distinct rows).
+    """
+    from collections import Counter
+    
+    if previous == current:
+        return 0
+    height = len(current)
+    previous_counts = Counter(previous)
+    current_counts = Counter(current)
+    previous_index = {value: i for i, value in enumerate(previous)}
+    
+    votes = Counter()
+    for i, value in enumerate(current):
+        if current_counts[value] == 1 and previous_counts[value] == 1:
+            offset = previous_index[value] - i
+            if 0 < offset <= height - min_overlap:
+                votes[offset] += 1
+    
+    best = None
+    for offset, count in votes.most_common(3):
+        overlap = height - offset
+        matches = sum(a == b for a, b in zip(previous[offset:], current[:overlap]))
+        if matches >= overlap * min_match and (best is None or matches > best[1]):
+            best = (offset, matches)
+    return best[0] if best else None
+
+
+class ScrollStitcher:
+    """Stitch successive grabs of a scrolling area into one tall image.
+    
+    Only the rows of the last frame are kept in memory; stitched rows are
+    spooled to a temporary file and streamed from there when saving. Rows
+    that stay in place while the rest scrolls (a sticky header or footer)
+    are detected and kept out of the match and the output.
+    """
+
+    def __init__(self, max_height=50000):
+        import tempfile
+        self.spool = tempfile.TemporaryFile(prefix="screenshot-crop-scroll-")
+        self.max_height = max_height
+        self.width = 0
+        self.channels = 0
+        self.height = 0  # Rows spooled so far
+        self.rows = None  # Rows of the last frame
+        self.hashes = None
+        self.written = 0  # Rows of the last frame, from the top, already spooled
+        self.footer = None  # Static rows at the bottom, written last
+
+    def add_frame(self, pixbuf):
+        """Add a grab of the area; returns the rows it added, or None if it did not fit"""
+        rows = [bytes(row) for row in pixbuf_rows(pixbuf)]
+        hashes = [hash(row) for row in rows]
+        if self.rows is None:
+            self.width = pixbuf.get_width()
+            self.channels = pixbuf.get_n_channels()
+            self.rows, self.hashes = rows, hashes
+            return len(rows)
+        if len(rows) != len(self.rows) or len(rows[0]) != len(self.rows[0]):
+            return None
+        
+        height = len(rows)
+        header = 0
+        while header < height and hashes[header] == self.hashes[header]:
+            header += 1
+        if header == height:
+            return 0  # Nothing moved
+        footer = 0
+        while hashes[height - 1 - footer] == self.hashes[height - 1 - footer]:
+            footer += 1
+        
+        offset = find_scroll_offset(self.hashes[header:height - footer],
+                                    hashes[header:height - footer])
+        if not offset:
+            return offset
+        
+        # Bottom rows can also match by chance (blank lines that line up), so
+        # the footer is the shortest run seen: a real one matches every time.
+        # It only shrinks, and rows held back before are written once known.
+        self.footer = footer if self.footer is None else min(self.footer, footer)
+        limit = height - self.footer
+        if self.height == 0:
+            # The first frame is written once the footer is known
+            self.write_rows(self.rows[:limit])
+            self.written = limit
+        added = rows[max(0, self.written - offset):limit]
+        self.write_rows(added)
+        self.rows, self.hashes, self.written = rows, hashes, limit
+        return len(added)
+
+    def write_rows(self, rows):
+        rows = rows[:max(0, self.max_height - self.height)]
+        self.spool.write(b"".join(rows))
+        self.height += len(rows)
+
+    def full(self):
+        """Whether max_height rows have been stitched"""
+        return self.height >= self.max_height
+
+    def finish(self):
+        """Append what is still pending: the only frame, or the unwritten rows of the last one"""
+        if self.rows is not None:
+            if self.height == 0:
+                self.write_rows(self.rows)
+            else:
+                self.write_rows(self.rows[self.written:])
+            self.rows = self.hashes = None
+        self.spool.flush()
+
+    def spooled_rows(self, band_rows=64):
+        """Yield the stitched rows back from the spool file"""
+        row_bytes = self.width * self.channels
+        self.spool.seek(0)
+        for top in range(0, self.height, band_rows):
+            band = memoryview(self.spool.read(row_bytes * min(band_rows, self.height - top)))
+            for i in range(0, len(band), row_bytes):
+                yield band[i:i + row_bytes]
+
+    def save(self, filepath, settings=None):
+        """Write the stitched image; PNG is streamed from the spool, other formats
+        need the whole image in memory once"""
+        settings = dict(DEFAULT_ENCODER_SETTINGS, **(settings or {}))
+        self.finish()
+        tmp_path = filepath + ".part"
+        try:
+            if format_for_path(filepath, settings['output_format']) == "png":
+                color_type = 6 if self.channels == 4 else 2
+                scanlines = filter_rows_up(self.spooled_rows(), self.width * self.channels)
+                write_png_scanlines(tmp_path, self.width, self.height, color_type, scanlines,
+                                    settings['png_compression'])
+                os.replace(tmp_path, filepath)
+            else:
+                self.spool.seek(0)
+                pixbuf = GdkPixbuf.Pixbuf.new_from_bytes(
+                    GLib.Bytes.new(self.spool.read()), GdkPixbuf.Colorspace.RGB,
+                    self.channels == 4, 8, self.width, self.height, self.width * self.channels)
+                write_image(pixbuf, filepath, settings)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            self.spool.close()
+
+
+def dhash(pixbuf):
+    """64-bit difference hash: brightness gradients of a 9x8 thumbnail"""
+    # TILES averages whole areas when reducing, which is what the hash wants
+    small = pixbuf.scale_simple(9, 8, GdkPixbuf.InterpType.TILES)
+    pixels = small.get_pixels()
+    stride = small.get_rowstride()
+    channels = small.get_n_channels()
+    
+    value = 0
+    for y in range(8):
+        row = pixels[y * stride:]
+        luma = [row[i] * 299 + row[i + 1] * 587 + row[i + 2] * 114
+                for i in range(0, 9 * channels, channels)]
+        for x in range(8):
+            value = (value << 1) | (luma[x] > luma[x + 1])
+    return value
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count("1")
+
+
+class HashIndex:
+    """Perceptual hashes of the screenshots saved in one folder.
+    
+    Stored as an append-only text file in the folder and searched through a
+    BK-tree, so a lookup only visits the branches within reach of the hash.
+    """
+    FILENAME = ".screenshot-crop-hashes"
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, self.FILENAME)
+        self.root = None  # [hash, names, {distance: child}]
+        self.mtime = None
+        self.load()
+
+    def load(self):
+        """Read the index file of the folder, if there is one"""
+        self.root = None
+        try:
+            self.mtime = os.stat(self.path).st_mtime
+            with open(self.path, 'r') as f:
+                for line in f:
+                    value, _, name = line.rstrip("\n").partition(" ")
+                    if name:
+                        self.insert(int(value, 16), name)
+        except FileNotFoundError:
+            self.mtime = None
+        except (OSError, ValueError) as e:
+            print(f"Could not read duplicate index: {e}")
+
+    def is_stale(self):
+        """Check whether another process added to the index file"""
+        try:
+            return os.stat(self.path).st_mtime != self.mtime
+        except OSError:
+            return self.mtime is not None
+
+    def insert(self, value, name):
+        if self.root is None:
+            self.root = [value, [name], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(name)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [name], {}]
+                return
+            node = child
+
+    def add(self, value, name):
+        """Record a saved screenshot, in memory and in the index file"""
+        self.insert(value, name)
+        try:
+            with open(self.path, 'a') as f:
+                f.write(f"{value:016x} {name}\n")
+            self.mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            print(f"Could not update duplicate index: {e}")
+
+    def find(self, value, max_distance):
+        """Return (distance, name) of indexed screenshots within max_distance, closest first"""
+        matches = []
+        pending = [self.root] if self.root else []
+        while pending:
+            node = pending.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                matches.extend((distance, name) for name in node[1])
+            # Triangle inequality: only children in this band can be close enough
+            for child_distance, child in node[2].items():
+                if abs(child_distance - distance) <= max_distance:
+                    pending.append(child)
+        return sorted(matches)
+
+
+class FrameRing:
+    """Fixed-size buffer of burst frames; the oldest frames are dropped first"""
+
+    def __init__(self, max_frames, max_bytes):
+        from collections import deque
+        self.frames = deque()
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        # Timing of every grab, including frames evicted since
+        self.grab_times = []
+        self.grab_durations = []
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def append(self, pixbuf, grab_time, grab_duration):
+        """Store a frame grabbed at grab_time (monotonic microseconds)"""
+        self.grab_times.append(grab_time)
+        self.grab_durations.append(grab_duration)
+        self.frames.append({'pixbuf': pixbuf, 'time': grab_time})
+        self.nbytes += pixbuf.get_byte_length()
+        # Always keep the newest frame, even if it alone exceeds the cap
+        while len(self.frames) > 1 and (len(self.frames) > self.max_frames or
+                                        self.nbytes > self.max_bytes):
+            dropped = self.frames.popleft()
+            self.nbytes -= dropped['pixbuf'].get_byte_length()
+
+    def jitter_ms(self, interval_ms):
+        """Mean and maximum deviation of grab intervals from interval_ms"""
+        times = self.grab_times
+        deviations = [abs((b - a) / 1000 - interval_ms) for a, b in zip(times, times[1:])]
+        if not deviations:
+            return 0, 0
+        import statistics
+        return statistics.mean(deviations), max(deviations)
+
+    def timing_report(self, interval_ms):
+        """Describe the achieved capture timing"""
+        import statistics
+        mean_jitter, max_jitter = self.jitter_ms(interval_ms)
+        grab_ms = statistics.mean(self.grab_durations) / 1000
+        frame = self.frames[-1]['pixbuf']
+        max_fps = 1000 / grab_ms if grab_ms > 0 else 0
+        return (f"Burst: {len(self.grab_times)} frames of "
+                f"{frame.get_width()}x{frame.get_height()} every {interval_ms} ms, "
+                f"jitter {mean_jitter:.1f} ms mean / {max_jitter:.1f} ms max, "
+                f"grab {grab_ms:.1f} ms (at most {max_fps:.0f} fps), "
+                f"{len(self.frames)} frames kept in {self.nbytes / 1048576:.0f} MB")
+
+
+class EncoderPool:
+    """Encode and write screenshots on worker threads, off the GTK main loop"""
+
+    def __init__(self, max_workers=min(4, os.cpu_count() or 2), max_pending=8):
+        self.executor = None  # Started on the first save
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0  # Only touched from the main loop
+
+    def has_capacity(self, count=1):
+        """Check whether count more jobs fit in the queue"""
+        return self.pending + count <= self.max_pending
+
+    def submit(self, pixbuf, filepath, callback, settings=None, writer=write_image):
+        """Queue pixbuf for writing; callback(filepath, error) runs on the main loop.
+
+        writer(pixbuf, filepath, settings) does the work. Returns False without
+        queueing anything when the queue is full.
+        """
+        if not self.has_capacity():
+            return False
+        self._start()
+        self.pending += 1
+        future = self.executor.submit(self._run, writer, pixbuf, filepath, settings,
+                                      GLib.get_monotonic_time())
+        future.add_done_callback(
+            lambda f: GLib.idle_add(self._finish, f, filepath, callback))
+        return True
+
+    def run(self, job, callback):
+        """Run job() on a worker; callback(result, error) runs on the main loop"""
+        self._start()
+        future = self.executor.submit(job)
+        future.add_done_callback(lambda f: GLib.idle_add(self._deliver, f, callback))
+
+    def _start(self):
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix="encoder")
+
+    def _run(self, writer, pixbuf, filepath, settings, queued):
+        TRACE.complete("encoder queue wait", queued, file=os.path.basename(filepath))
+        writer(pixbuf, filepath, settings)
+
+    def _finish(self, future, filepath, callback):
+        self.pending -= 1
+        callback(filepath, future.exception())
+        return False
+
+    def _deliver(self, future, callback):
+        error = future.exception()
+        callback(None if error else future.result(), error)
+        return False
+
+
+def run_command(argv, callback=None):
+    """Start argv without blocking, callback(error) runs on the main loop when it exits.
+    
+    error is None on success, otherwise a message. No shell is involved, so
+    paths with quotes or spaces are passed through untouched.
+    """
+    from gi.repository import Gio
+    
+    try:
+        process = Gio.Subprocess.new(argv, Gio.SubprocessFlags.STDOUT_SILENCE)
+    except GLib.Error as e:
+        if callback:
+            message = e.message
+            GLib.idle_add(lambda: callback(message) and False)
+        return
+    
+    def on_exit(process, result):
+        try:
+            process.wait_check_finish(result)
+            error = None
+        except GLib.Error as e:
+            error = e.message
+        if callback:
+            callback(error)
+    process.wait_check_async(None, on_exit)
+
+
+def open_path(path, callback=None):
+    """Open a file or folder in the user's default application"""
+    run_command(["xdg-open", path], callback)
+
+
+def expand_command(command, filepath):
+    """Argument list of a post-save action for filepath.
+    
+    command is a list of arguments or a shell-like string; {path}, {folder}
+    and {name} are replaced in each argument after splitting.
+    """
+    import shlex
+    argv = shlex.split(command) if isinstance(command, str) else list(command)
+    fields = {
+        "{path}": filepath,
+        "{folder}": os.path.dirname(filepath),
+        "{name}": os.path.basename(filepath),
+    }
+    for i, arg in enumerate(argv):
+        for field, value in fields.items():
+            arg = arg.replace(field, value)
+        argv[i] = arg
+    return argv
+
+
+THUMBNAIL_SIZE = 128  # freedesktop.org "normal" size
+
+
+def thumbnail_cache_path(uri):
+    """Location of the shared freedesktop.org thumbnail for uri"""
+    import hashlib
+    digest = hashlib.md5(uri.encode()).hexdigest()
+    return os.path.join(GLib.get_user_cache_dir(), "thumbnails", "normal", f"{digest}.png")
+
+
+def load_thumbnail(path):
+    """Thumbnail of the image at path from the shared cache, regenerated if outdated.
+    
+    Safe to call from worker threads. Thumbnails written here follow the
+    freedesktop.org spec, so file managers reuse them and vice versa.
+    """
+    uri = GLib.filename_to_uri(path, None)
+    mtime = str(int(os.stat(path).st_mtime))
+    cache_path = thumbnail_cache_path(uri)
+    
+    try:
+        thumbnail = GdkPixbuf.Pixbuf.new_from_file(cache_path)
+        if (thumbnail.get_option("tEXt::Thumb::MTime") == mtime and
+                thumbnail.get_option("tEXt::Thumb::URI") == uri):
+            return thumbnail
+    except GLib.Error:
+        pass  # Missing or unreadable, generate it again
+    
+    thumbnail = GdkPixbuf.Pixbuf.new_from_file_at_scale(path, THUMBNAIL_SIZE,
+                                                        THUMBNAIL_SIZE, True)
+    tmp_path = f"{cache_path}.{os.getpid()}-{id(thumbnail)}.part"
+    try:
+        os.makedirs(os.path.dirname(cache_path), mode=0o700, exist_ok=True)
+        thumbnail.savev(tmp_path, "png", ["tEXt::Thumb::URI", "tEXt::Thumb::MTime"],
+                        [uri, mtime])
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, cache_path)
+    except (GLib.Error, OSError) as e:
+        print(f"Could not cache thumbnail: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return thumbnail
+
+
+def list_images(folder):
+    """Paths of the images in folder, newest first"""
+    extensions = {ext for info in IMAGE_FORMATS.values() for ext in info['extensions']}
+    entries = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                entries.append((entry.stat().st_mtime, entry.path))
+    entries.sort(reverse=True)
+    return [path for mtime, path in entries]
+
+
+class GalleryWindow(Gtk.Window):
+    """Browser for the screenshots of a folder.
+    
+    Every file gets a row with a placeholder right away; thumbnails are only
+    loaded for the rows in view, on worker threads, and dropped again once
+    far out of view, so folders of tens of thousands of files stay smooth.
+    The list runs in fixed-height mode: a thumbnail arriving redraws its own
+    row only, where a GtkIconView would lay out every item again.
+    """
+    MAX_LOADED = 600  # Thumbnails kept in memory
+
+    def __init__(self, parent, folders):
+        super().__init__(title="Screenshot Gallery")
+        self.set_transient_for(parent)
+        self.set_default_size(900, 650)
+        self.set_border_width(10)
+        
+        from collections import OrderedDict
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnail")
+        self.generation = 0  # Bumped when the folder changes, stale results are dropped
+        self.wanted = range(0)  # Rows in or near view, read by the workers
+        self.requested = set()
+        self.loaded = OrderedDict()
+        self.scroll_pending = False
+        
+        self.placeholder = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, True, 8,
+                                                THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        self.placeholder.fill(0x80808040)
+        
+        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        self.add(vbox)
+        
+        header = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        header.pack_start(Gtk.Label(label="Folder:"), False, False, 0)
+        self.folder_combo = Gtk.ComboBoxText()
+        for folder in folders:
+            self.folder_combo.append(folder, folder.replace(os.path.expanduser("~"), "~"))
+        header.pack_start(self.folder_combo, True, True, 0)
+        self.count_label = Gtk.Label(label="")
+        header.pack_start(self.count_label, False, False, 0)
+        vbox.pack_start(header, False, False, 0)
+        
+        self.store = Gtk.ListStore(str, str, GdkPixbuf.Pixbuf)  # name, path, thumbnail
+        self.tree_view = Gtk.TreeView(model=self.store)
+        self.tree_view.set_headers_visible(False)
+        # Fixed column widths and row heights: no row is ever measured
+        pixbuf_renderer = Gtk.CellRendererPixbuf()
+        pixbuf_renderer.set_fixed_size(THUMBNAIL_SIZE + 8, THUMBNAIL_SIZE + 8)
+        for renderer, attribute, column_index, width in (
+                (pixbuf_renderer, "pixbuf", 2, THUMBNAIL_SIZE + 8),
+                (Gtk.CellRendererText(), "text", 0, 600)):
+            column = Gtk.TreeViewColumn("", renderer, **{attribute: column_index})
+            column.set_sizing(Gtk.TreeViewColumnSizing.FIXED)
+            column.set_fixed_width(width)
+            self.tree_view.append_column(column)
+        self.tree_view.set_fixed_height_mode(True)
+        self.tree_view.connect("row-activated", self.on_row_activated)
+        
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.add(self.tree_view)
+        scrolled.get_vadjustment().connect("value-changed", self.on_scrolled)
+        scrolled.connect("size-allocate", self.on_scrolled)
+        vbox.pack_start(scrolled, True, True, 0)
+        
+        self.folder_combo.connect("changed", lambda combo: self.load_folder(combo.get_active_id()))
+        self.connect("destroy", self.on_destroy)
+        self.folder_combo.set_active(0)
+    
+    def load_folder(self, folder):
+        """List folder in the background and show a placeholder per image"""
+        self.generation += 1
+        self.wanted = range(0)
+        self.requested.clear()
+        self.loaded.clear()
+        self.store.clear()
+        self.count_label.set_text("Loading...")
+        generation = self.generation
+        
+        def scan():
+            try:
+                paths = list_images(folder)
+            except OSError as e:
+                print(f"Could not list {folder}: {e}")
+                paths = []
+            GLib.idle_add(self.on_folder_listed, generation, paths)
+        self.executor.submit(scan)
+    
+    def on_folder_listed(self, generation, paths):
+        if generation != self.generation:
+            return False
+        # Fill a detached model, the view picks it up in one go
+        store = Gtk.ListStore(str, str, GdkPixbuf.Pixbuf)
+        for path in paths:
+            store.append([os.path.basename(path), path, self.placeholder])
+        self.store = store
+        self.tree_view.set_model(store)
+        self.count_label.set_text(f"{len(paths)} images")
+        GLib.idle_add(self.request_visible, priority=GLib.PRIORITY_LOW)
+        return False
+    
+    def on_scrolled(self, *args):
+        # Coalesce scroll events into one thumbnail request per ~60 ms
+        if not self.scroll_pending:
+            self.scroll_pending = True
+            GLib.timeout_add(60, self.request_visible)
+    
+    def request_visible(self):
+        """Queue thumbnails for the rows in view and one screenful around them"""
+        self.scroll_pending = False
+        visible = self.tree_view.get_visible_range()
+        if not visible:
+            return False
+        first = visible[0].get_indices()[0]
+        last = visible[1].get_indices()[0]
+        span = last - first + 1
+        self.wanted = range(max(0, first - span), min(len(self.store), last + span + 1))
+        
+        generation = self.generation
+        for index in self.wanted:
+            if index not in self.requested:
+                self.requested.add(index)
+                self.executor.submit(self.thumbnail_task, generation, index,
+                                     self.store[index][1])
+        return False
+    
+    def thumbnail_task(self, generation, index, path):
+        """Worker: load one thumbnail, unless the row scrolled away meanwhile"""
+        thumbnail = None
+        if generation == self.generation and index in self.wanted:
+            try:
+                loaded = load_thumbnail(path)
+                # Centred on a tile of the placeholder's size, so all rows look alike
+                thumbnail = self.placeholder.copy()
+                thumbnail.fill(0)
+                width, height = loaded.get_width(), loaded.get_height()
+                loaded.copy_area(0, 0, width, height, thumbnail,
+                                 (THUMBNAIL_SIZE - width) // 2, (THUMBNAIL_SIZE - height) // 2)
+            except (GLib.Error, OSError) as e:
+                print(f"Could not load thumbnail for {path}: {e}")
+                return
+        GLib.idle_add(self.on_thumbnail, generation, index, path, thumbnail)
+    
+    def on_thumbnail(self, generation, index, path, thumbnail):
+        if generation != self.generation:
+            return False
+        if thumbnail is None:
+            # Skipped while out of view, may be requested again later
+            self.requested.discard(index)
+            return False
+        
+        row = self.store[index]
+        if row[1] == path:
+            row[2] = thumbnail
+            self.loaded[index] = True
+            self.loaded.move_to_end(index)
+        
+        # Drop the thumbnails that have been out of view the longest
+        for old_index in list(self.loaded):
+            if len(self.loaded) <= self.MAX_LOADED:
+                break
+            if old_index not in self.wanted:
+                del self.loaded[old_index]
+                self.requested.discard(old_index)
+                self.store[old_index][2] = self.placeholder
+        return False
+    
+    def on_row_activated(self, tree_view, tree_path, column):
+        path = self.store[tree_path][1]
+        open_path(path, lambda error: error and print(f"Could not open {path}: {error}"))
+    
+    def on_destroy(self, widget):
+        self.generation += 1  # Queued tasks become no-ops
+        self.executor.shutdown(wait=False)
+
+
 class ScreenshotCropTool(Gtk.Window):
     def __init__(self):
         super().__init__(title="Screenshot Tool")
@@ -23,14 +1399,32 @@ class ScreenshotCropTool(Gtk.Window):
         self.countdown_active = False
         self.remaining_seconds = 0
         self.captured_pixbuf = None
+        self.frames = None  # FrameRing of the last burst capture
         self.selected_monitor = None
+        self.capture_all = False  # "All Monitors" entry selected
+        self.plain_capture = False  # Overlay only, without the burst and region choices
         self.monitor_geometries = []
         self.updating_combo = False  # Flag to prevent recursion
+        self.daemon_mode = False  # Stay alive in the background when closed
+        self.crop_window = None
+        self.encoder = EncoderPool()
+        self.pending_saves = {}  # filepath -> actions waiting for the write
+        self.save_dialogs = {}  # filepath -> state of the open dialog reporting its write
+        self.hash_indexes = {}  # folder -> HashIndex
+        self.hash_lock = None  # Guards the indexes on encoder threads, see queue_save
+        self.config_save_id = None  # Pending debounced config write
+        self.config_written = None  # Last JSON written, unchanged configs are not rewritten
+        self.unreachable_folders = set()  # Recent folders whose check timed out
+        self.clipboard_owned = False  # A crop was copied to the clipboard
+        self.status_message = ""  # Shown under the buttons once nothing is pending
+        self.capture_started = 0  # Trace timestamps of the current capture
+        self.hide_started = 0
         
         # Load config for persistent storage
         self.config_file = os.path.expanduser("~/.config/screenshot-crop/config.json")
         self.load_config()
         self.save_folder = self.config.get('last_folder', os.path.expanduser("~/Pictures"))
+        prefer_capture_backend(self.config.get('capture_backend', 'gdk'))
         
         # Main container
         vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
@@ -76,6 +1470,22 @@ class ScreenshotCropTool(Gtk.Window):
         
         options_vbox.pack_start(monitor_box, False, False, 0)
         
+        # Region: drag one on screen, or grab a saved one without the overlay
+        region_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        region_box.pack_start(Gtk.Label(label="Region:"), False, False, 0)
+        
+        self.region_combo = Gtk.ComboBoxText()
+        region_box.pack_start(self.region_combo, True, True, 0)
+        
+        self.preset_button = Gtk.Button(label="Save as Preset...")
+        self.preset_button.set_tooltip_text("Name the last region saved on this monitor")
+        self.preset_button.connect("clicked", self.on_save_region_preset)
+        region_box.pack_start(self.preset_button, False, False, 0)
+        
+        options_vbox.pack_start(region_box, False, False, 0)
+        self.update_region_combo()
+        self.monitor_combo.connect("changed", lambda combo: self.update_region_combo())
+        
         # Delay setting
         delay_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
         delay_label = Gtk.Label(label="Delay before capture (seconds):")
@@ -88,6 +1498,48 @@ class ScreenshotCropTool(Gtk.Window):
         
         options_vbox.pack_start(delay_box, False, False, 0)
         
+        # Burst setting, to catch short-lived UI states
+        burst_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        burst_box.pack_start(Gtk.Label(label="Burst capture:"), False, False, 0)
+        
+        self.burst_spin = Gtk.SpinButton.new_with_range(1, 50, 1)
+        self.burst_spin.set_value(1)  # Single frame by default
+        burst_box.pack_start(self.burst_spin, False, False, 0)
+        burst_box.pack_start(Gtk.Label(label="frames every"), False, False, 0)
+        
+        self.interval_spin = Gtk.SpinButton.new_with_range(20, 5000, 10)
+        self.interval_spin.set_value(100)
+        burst_box.pack_start(self.interval_spin, False, False, 0)
+        burst_box.pack_start(Gtk.Label(label="ms"), False, False, 0)
+        
+        options_vbox.pack_start(burst_box, False, False, 0)
+        
+        # Output format and encoder trade-off
+        format_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        format_box.pack_start(Gtk.Label(label="Save as:"), False, False, 0)
+        
+        # Only the current preset is listed at first; asking gdk-pixbuf which
+        # formats it can write waits until the list is opened
+        self.format_combo = Gtk.ComboBoxText()
+        active_preset = preset_for_settings(self.encoder_settings())
+        for preset_id, label, settings in ENCODER_PRESETS:
+            if preset_id == active_preset:
+                self.format_combo.append(preset_id, label)
+        self.format_combo.set_active_id(active_preset)
+        self.format_combo_filled = False
+        self.format_combo.connect("notify::popup-shown", self.fill_format_combo)
+        self.format_combo.connect("changed", self.on_format_changed)
+        format_box.pack_start(self.format_combo, False, False, 0)
+        
+        self.quick_save_check = Gtk.CheckButton(label="Quick save (no file dialog)")
+        self.quick_save_check.set_active(self.config.get('quick_save', False))
+        self.quick_save_check.set_tooltip_text(
+            "Save to the folder below with a generated name; Shift+Enter still asks")
+        self.quick_save_check.connect("toggled", self.on_quick_save_toggled)
+        format_box.pack_start(self.quick_save_check, False, False, 0)
+        
+        options_vbox.pack_start(format_box, False, False, 0)
+        
         # Folder selection with recent folders dropdown
         folder_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
         folder_label = Gtk.Label(label="Save to:")
@@ -96,7 +1548,14 @@ class ScreenshotCropTool(Gtk.Window):
         # ComboBox for recent folders
         self.folder_combo = Gtk.ComboBoxText.new_with_entry()
         self.folder_entry = self.folder_combo.get_child()
-        self.update_folder_combo()
+        # Only the current folder is visible at first, fill the history when idle
+        self.updating_combo = True
+        self.folder_combo.append_text(self.save_folder)
+        self.folder_combo.set_active(0)
+        self.updating_combo = False
+        GLib.idle_add(self.update_folder_combo)
+        # The folder checks start their threads once the window is on screen
+        self.first_map_id = self.connect("map-event", self.on_first_map)
         self.folder_combo.connect("changed", self.on_folder_combo_changed)
         folder_box.pack_start(self.folder_combo, True, True, 0)
         
@@ -104,6 +1563,10 @@ class ScreenshotCropTool(Gtk.Window):
         browse_button.connect("clicked", self.on_browse_folder)
         folder_box.pack_start(browse_button, False, False, 0)
         
+        gallery_button = Gtk.Button(label="Gallery")
+        gallery_button.connect("clicked", self.on_show_gallery)
+        folder_box.pack_start(gallery_button, False, False, 0)
+        
         options_vbox.pack_start(folder_box, False, False, 0)
         
         # Help text
@@ -148,36 +1611,125 @@ class ScreenshotCropTool(Gtk.Window):
         """Load configuration from file"""
         self.config = {
             'last_folder': os.path.expanduser("~/Pictures"),
-            'recent_folders': []
+            'recent_folders': [],
+            'burst_memory_mb': 512,
+            'detect_duplicates': True,
+            'duplicate_threshold': 4,  # Max differing bits of the 64-bit hash
+            'post_save_actions': [],  # {"label", "command", "auto"} hooks
+            'clipboard_also_save': False,  # Also write copied crops to the save folder
+            'quick_save': False,  # Save without the file dialog
+            'filename_template': DEFAULT_FILENAME_TEMPLATE,
+            'sequence_counters': {},  # folder -> next {seq} of the filename template
+            'region_presets': {},  # monitor key -> {name: [x, y, width, height]}
+            'last_regions': {},  # monitor key -> last saved [x, y, width, height]
+            'capture_backend': 'gdk',  # See CAPTURE_BACKENDS
+            'hide_settle_ms': 40,  # Without a compositor: wait after the unmap before grabbing
+            **DEFAULT_ENCODER_SETTINGS
         }
         
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    loaded_config = json.load(f)
-                    self.config.update(loaded_config)
-                    # Validate folders still exist
-                    self.config['recent_folders'] = [
-                        f for f in self.config['recent_folders'] 
-                        if os.path.exists(f)
-                    ][:10]  # Keep max 10 recent folders
+            with open(self.config_file, 'r') as f:
+                self.config_written = f.read()
+            self.config.update(json.loads(self.config_written))
+            # Folders are checked in the background, see validate_recent_folders
+            self.config['recent_folders'] = self.config['recent_folders'][:10]  # Keep max 10
+        except FileNotFoundError:
+            pass
         except Exception as e:
             print(f"Could not load config: {e}")
     
+    def on_first_map(self, widget, event):
+        """Start the startup work the first frame does not need"""
+        self.disconnect(self.first_map_id)
+        GLib.idle_add(self.validate_recent_folders)
+        return False
+    
+    def validate_recent_folders(self, timeout_ms=2000):
+        """Drop recent folders that no longer exist, without blocking the UI.
+        
+        Each folder is checked on its own daemon thread, since a stat on a dead
+        NFS or SMB mount can hang indefinitely. Folders that have not answered
+        within timeout_ms are hidden from the dropdown but kept in the config.
+        """
+        folders = list(self.config['recent_folders'])
+        if not folders:
+            return
+        results = {}
+        state = {'finished': False}
+        
+        def check(folder):
+            exists = os.path.isdir(folder)
+            GLib.idle_add(on_checked, folder, exists)
+        
+        def on_checked(folder, exists):
+            results[folder] = exists
+            if state['finished']:
+                # Late answer from a slow mount
+                self.unreachable_folders.discard(folder)
+                apply({folder: exists}, refresh=True)
+            elif len(results) == len(folders):
+                GLib.source_remove(state['timeout_id'])
+                finish()
+            return False
+        
+        def finish():
+            state['finished'] = True
+            self.unreachable_folders = {f for f in folders if f not in results}
+            for folder in self.unreachable_folders:
+                print(f"Folder check timed out: {folder}")
+            apply(results, refresh=bool(self.unreachable_folders))
+            return False
+        
+        def apply(checked, refresh=False):
+            missing = {f for f, exists in checked.items() if not exists}
+            if missing:
+                self.config['recent_folders'] = [
+                    f for f in self.config['recent_folders'] if f not in missing
+                ]
+                self.save_config()
+            if missing or refresh:
+                self.update_folder_combo()
+        
+        import threading
+        state['timeout_id'] = GLib.timeout_add(timeout_ms, finish)
+        for folder in folders:
+            threading.Thread(target=check, args=(folder,), daemon=True).start()
+    
     def save_config(self):
-        """Save configuration to file"""
+        """Schedule a config write, bursts of changes end up in one write"""
+        if self.config_save_id is None:
+            self.config_save_id = GLib.timeout_add(500, self.flush_config)
+    
+    def flush_config(self):
+        """Write the configuration now, atomically"""
+        if self.config_save_id is not None:
+            GLib.source_remove(self.config_save_id)
+            self.config_save_id = None
+        
+        tmp_path = f"{self.config_file}.part"
         try:
             # Validate config before saving
             if not isinstance(self.config.get('recent_folders'), list):
                 self.config['recent_folders'] = []
             
+            text = json.dumps(self.config, indent=2)
+            if text == self.config_written:
+                return False
+            
             os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            with open(tmp_path, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config_file)
+            self.config_written = text
         except RecursionError:
             print("Recursion error while saving config - skipping save")
         except Exception as e:
             print(f"Could not save config: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return False
     
     def add_recent_folder(self, folder):
         """Add folder to recent folders list"""
@@ -200,13 +1752,14 @@ class ScreenshotCropTool(Gtk.Window):
         
         # Add recent folders
         for folder in self.config['recent_folders']:
-            if folder != self.save_folder:
+            if folder != self.save_folder and folder not in self.unreachable_folders:
                 # Show shortened path for display
                 display_path = folder.replace(os.path.expanduser("~"), "~")
                 self.folder_combo.append_text(folder)
         
         self.folder_combo.set_active(0)
         self.updating_combo = False  # Clear flag
+        return False
     
     def on_folder_combo_changed(self, combo):
         """Handle folder selection from dropdown"""
@@ -218,11 +1771,222 @@ class ScreenshotCropTool(Gtk.Window):
             self.save_folder = os.path.expanduser(text)
             self.add_recent_folder(self.save_folder)
     
+    def encoder_settings(self):
+        """Current encoder settings from the config"""
+        return {key: self.config.get(key, default)
+                for key, default in DEFAULT_ENCODER_SETTINGS.items()}
+    
+    def on_format_changed(self, combo):
+        """Remember the selected output format preset"""
+        for preset_id, label, settings in ENCODER_PRESETS:
+            if preset_id == combo.get_active_id():
+                self.config.update(settings)
+                self.save_config()
+    
+    def fill_format_combo(self, combo, pspec):
+        """List every preset the installed loaders can write, the first time it opens"""
+        if self.format_combo_filled or not combo.get_property("popup-shown"):
+            return
+        self.format_combo_filled = True
+        available = writable_formats()
+        active_preset = combo.get_active_id()
+        position = 0
+        for preset_id, label, settings in ENCODER_PRESETS:
+            if preset_id == active_preset:
+                position += 1
+            elif settings['output_format'] in available:
+                combo.insert(position, preset_id, label)
+                position += 1
+    
+    def on_quick_save_toggled(self, button):
+        """Remember whether saves skip the file dialog"""
+        self.config['quick_save'] = button.get_active()
+        self.save_config()
+    
     def on_destroy(self, widget):
         """Save config before closing"""
-        self.save_config()
+        self.flush_config()
         Gtk.main_quit()
     
+    def quit_or_hide(self):
+        """Quit, or just hide the window when running as a daemon"""
+        if self.daemon_mode:
+            self.flush_config()
+            self.reset_ui()
+            self.hide()
+        else:
+            self.destroy()
+    
+    def start_daemon(self, path):
+        """Keep running in the background and accept commands on a Unix socket"""
+        import socket
+        
+        self.daemon_mode = True
+        
+        if os.path.exists(path):
+            # Refuse to take over the socket of a daemon that is still alive
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(path)
+                except ConnectionRefusedError:
+                    os.remove(path)
+                else:
+                    raise CaptureError(f"A daemon is already listening on {path}")
+        
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(path)
+        os.chmod(path, 0o600)
+        self.listener.listen(4)
+        self.listener.setblocking(False)
+        self.socket_path = path
+        GLib.unix_fd_add_full(GLib.PRIORITY_DEFAULT, self.listener.fileno(),
+                              GLib.IOCondition.IN, self.on_remote_connection)
+        
+        # Keep monitor geometries current while we stay resident
+        display = Gdk.Display.get_default()
+        display.connect("monitor-added", lambda d, m: self.populate_monitor_list())
+        display.connect("monitor-removed", lambda d, m: self.populate_monitor_list())
+    
+    def on_remote_connection(self, fd, condition):
+        """Accept a client; its request is read by its own watch, never blocking the UI"""
+        try:
+            conn, _ = self.listener.accept()
+        except OSError:
+            return True
+        conn.setblocking(False)
+        client = {'conn': conn, 'data': b"", 'done': False}
+        client['watch'] = GLib.unix_fd_add_full(
+            GLib.PRIORITY_DEFAULT, conn.fileno(),
+            GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+            self.on_remote_data, client)
+        # A client that never finishes its request is dropped
+        client['timeout'] = GLib.timeout_add_seconds(5, self.drop_remote_client, client)
+        return True
+    
+    def drop_remote_client(self, client):
+        """Close a client that did not send a complete request in time"""
+        client['timeout'] = None
+        if not client['done']:
+            client['done'] = True
+            GLib.source_remove(client['watch'])
+            client['conn'].close()
+        return False
+    
+    def on_remote_data(self, fd, condition, client):
+        """Read what a client sent; once the request is complete, answer it"""
+        conn = client['conn']
+        try:
+            chunk = conn.recv(4096)
+        except BlockingIOError:
+            return True
+        except OSError:
+            chunk = b""
+        client['data'] += chunk
+        if chunk and not client['data'].endswith(b"\n") and len(client['data']) < 65536:
+            return True
+        
+        client['done'] = True
+        if client['timeout']:
+            GLib.source_remove(client['timeout'])
+        
+        def respond(reply):
+            try:
+                conn.setblocking(True)
+                conn.settimeout(1)
+                conn.sendall(json.dumps(reply).encode() + b"\n")
+            except OSError:
+                pass
+            finally:
+                conn.close()
+        
+        try:
+            request = json.loads(client['data'])
+            if not isinstance(request, dict):
+                reply = {'ok': False, 'error': "Bad request: expected a JSON object"}
+            else:
+                reply = self.handle_remote_command(request, respond)
+        except ValueError as e:
+            reply = {'ok': False, 'error': f"Bad request: {str(e)}"}
+        except Exception as e:
+            # Never let a request take the daemon down
+            print(f"Remote command failed: {e}")
+            reply = {'ok': False, 'error': f"Command failed: {str(e)}"}
+        if reply is not None:
+            respond(reply)
+        return False
+    
+    def check_remote_request(self, request):
+        """Validate the monitor, region and delay of a request; returns an error or None"""
+        number = request.get('monitor', 1)
+        region = request.get('region')
+        delay = request.get('delay', 0)
+        if type(number) is not int:
+            return f"Monitor must be a number, not {json.dumps(number)}"
+        if not 1 <= number <= len(self.monitor_geometries):
+            return f"Monitor {number} does not exist ({len(self.monitor_geometries)} found)"
+        if region is not None and (not isinstance(region, list) or len(region) != 4
+                                   or any(type(v) is not int for v in region)):
+            return "Region must be a list of four numbers: x, y, width, height"
+        if type(delay) not in (int, float) or not 0 <= delay <= 3600:
+            return "Delay must be a number of seconds from 0 to 3600"
+        return None
+    
+    def handle_remote_command(self, request, respond):
+        """Run a client command and return the reply, or None when it is
+        passed to respond later"""
+        command = request.get('command')
+        
+        if command in ("capture", "overlay"):
+            error = self.check_remote_request(request)
+            if error:
+                return {'ok': False, 'error': error}
+        
+        if command == "show":
+            self.present()
+            self.show_all()
+        elif command == "quit":
+            GLib.idle_add(self.destroy)
+        elif command == "capture":
+            if not isinstance(request.get('output'), str):
+                return {'ok': False, 'error': "capture requires an output path"}
+            
+            output = request['output']
+            
+            def on_written(filepath, error):
+                if error:
+                    respond({'ok': False, 'error': f"Error saving screenshot: {str(error)}"})
+                else:
+                    respond({'ok': True, 'output': filepath})
+            
+            def capture():
+                # Encoded on the pool with the configured format and quality
+                try:
+                    pixbuf = grab_monitor_area(self.monitor_geometries,
+                                               request.get('monitor', 1), request.get('region'))
+                except Exception as e:
+                    # The client is waiting, it always gets an answer
+                    respond({'ok': False, 'error': str(e)})
+                    return False
+                if not self.encoder.submit(pixbuf, output, on_written, self.encoder_settings()):
+                    respond({'ok': False, 'error': "Too many screenshots are still being saved"})
+                return False
+            
+            # The client waits for the reply, so it comes after the file is written
+            GLib.timeout_add(int(request.get('delay', 0) * 1000), capture)
+            return None
+        elif command == "overlay":
+            if self.countdown_active or self.crop_window or \
+                    not self.capture_button.get_sensitive():
+                return {'ok': False, 'error': "A capture is already in progress"}
+            # Same path as the Capture button, with the requested monitor and
+            # delay instead of the main window's choices, which stay as they are
+            delay = request.get('delay', 0)
+            self.start_capture(request.get('monitor', 1) - 1, int(delay) + (delay % 1 > 0),
+                               plain=True)
+        else:
+            return {'ok': False, 'error': f"Unknown command: {command}"}
+        return {'ok': True}
+    
     def show_help(self, widget):
         """Show help/about dialog"""
         dialog = Gtk.AboutDialog()
@@ -244,8 +2008,12 @@ class ScreenshotCropTool(Gtk.Window):
         usage_text = """
 Keyboard Shortcuts:
 • Enter - Save selected area
+• Shift+Enter - Save selected area, always asking for a file name
 • Escape - Cancel crop operation  
 • Ctrl+S - Save full capture without cropping
+• C / Ctrl+C - Copy selected area to the clipboard
+• T - Scrolling capture: scroll the selected area, it is stitched into one image
+• Left/Right - Choose a frame after a burst capture
 • Escape (3x) - Force close if unresponsive
 
 Tips:
@@ -293,34 +2061,122 @@ Tips:
         
         dialog.destroy()
     
+    def on_show_gallery(self, widget):
+        """Open the thumbnail browser on the current and recent folders"""
+        folders = [self.save_folder] + [f for f in self.config['recent_folders']
+                                        if f != self.save_folder]
+        GalleryWindow(self, folders).show_all()
+    
     def populate_monitor_list(self):
         """Populate the monitor dropdown with available monitors"""
         self.monitor_combo.remove_all()
-        self.monitor_geometries = []
         
-        display = Gdk.Display.get_default()
-        n_monitors = display.get_n_monitors()
+        # Store geometries for later use
+        self.monitor_geometries = list_monitors(Gdk.Display.get_default())
         
-        for i in range(n_monitors):
-            monitor = display.get_monitor(i)
-            geometry = monitor.get_geometry()
-            is_primary = display.get_primary_monitor() == monitor
-            model = monitor.get_model() or f"Display {i+1}"
-            
-            # Store geometry for later use
-            self.monitor_geometries.append({
-                'index': i,
-                'geometry': geometry,
-                'monitor': monitor
-            })
+        for info in self.monitor_geometries:
+            geometry = info['geometry']
             
             # Add to combo box
-            label = f"Monitor {i+1}: {model} ({geometry.width}x{geometry.height})"
-            if is_primary:
+            label = (f"Monitor {info['index']+1}: {info['model']} "
+                     f"({geometry.width}x{geometry.height})")
+            if info['is_primary']:
                 label += " [Primary]"
             self.monitor_combo.append_text(label)
+        
+        if len(self.monitor_geometries) > 1:
+            self.monitor_combo.append_text(
+                f"All Monitors ({len(self.monitor_geometries)} files)")
             
     
+    def current_monitor(self):
+        """Monitor selected in the dropdown, None for "All Monitors" """
+        index = self.monitor_combo.get_active()
+        if 0 <= index < len(self.monitor_geometries):
+            return self.monitor_geometries[index]
+        return None
+    
+    def update_region_combo(self):
+        """List the last region and the presets saved for the selected monitor"""
+        active = self.region_combo.get_active_id()
+        self.region_combo.remove_all()
+        self.region_combo.append("", "Select on screen")
+        
+        monitor = self.current_monitor()
+        if monitor:
+            key = monitor_key(monitor['geometry'])
+            last = self.config['last_regions'].get(key)
+            if last:
+                self.region_combo.append("last", f"Last region ({last[2]}x{last[3]})")
+            for name, region in sorted(self.config['region_presets'].get(key, {}).items()):
+                self.region_combo.append(f"preset:{name}", f"{name} ({region[2]}x{region[3]})")
+        
+        if not active or not self.region_combo.set_active_id(active):
+            self.region_combo.set_active_id("")
+        self.preset_button.set_sensitive(bool(monitor and self.config['last_regions'].get(
+            monitor_key(monitor['geometry']))))
+    
+    def selected_region(self):
+        """Saved region chosen for the selected monitor, or None to select on screen"""
+        region_id = self.region_combo.get_active_id()
+        monitor = self.current_monitor()
+        if not region_id or not monitor:
+            return None
+        key = monitor_key(monitor['geometry'])
+        if region_id == "last":
+            region = self.config['last_regions'].get(key)
+        else:
+            region = self.config['region_presets'].get(key, {}).get(region_id[len("preset:"):])
+        return region and clamp_region(region, monitor['geometry'])
+    
+    def remember_region(self, x, y, width, height):
+        """Store the region just saved as the monitor's last region"""
+        if not self.selected_monitor:
+            return
+        region = clamp_region((x, y, width, height), self.selected_monitor['geometry'])
+        if region:
+            self.config['last_regions'][monitor_key(self.selected_monitor['geometry'])] = region
+            self.save_config()
+            self.update_region_combo()
+    
+    def on_save_region_preset(self, widget):
+        """Ask for a name and store the last region of the monitor under it"""
+        monitor = self.current_monitor()
+        if not monitor:
+            return
+        key = monitor_key(monitor['geometry'])
+        region = self.config['last_regions'].get(key)
+        if not region:
+            return
+        
+        dialog = Gtk.Dialog(title="Save Region Preset", transient_for=self, flags=0)
+        dialog.add_buttons(
+            Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+            Gtk.STOCK_SAVE, Gtk.ResponseType.OK
+        )
+        dialog.set_default_response(Gtk.ResponseType.OK)
+        entry = Gtk.Entry()
+        entry.set_activates_default(True)
+        entry.set_placeholder_text("e.g. Sidebar")
+        content = dialog.get_content_area()
+        content.set_spacing(10)
+        content.set_border_width(10)
+        content.add(Gtk.Label(label=f"Name for the {region[2]}x{region[3]} region at "
+                                    f"{region[0]},{region[1]}:"))
+        content.add(entry)
+        dialog.show_all()
+        
+        response = dialog.run()
+        name = entry.get_text().strip()
+        dialog.destroy()
+        if response != Gtk.ResponseType.OK or not name:
+            return
+        
+        self.config['region_presets'].setdefault(key, {})[name] = list(region)
+        self.save_config()
+        self.update_region_combo()
+        self.region_combo.set_active_id(f"preset:{name}")
+    
     def identify_monitors(self, widget):
         """Show monitor identification numbers on each screen"""
         display = Gdk.Display.get_default()
@@ -400,22 +2256,40 @@ Tips:
             self.countdown_active = False
             self.reset_ui()
         else:
-            self.destroy()
+            self.quit_or_hide()
     
     def reset_ui(self):
         """Reset UI after canceling countdown"""
-        self.countdown_label.set_markup("")
-        self.capture_button.set_sensitive(True)
+        if self.encoder.has_capacity():
+            self.countdown_label.set_markup(self.status_message)
+        else:
+            self.countdown_label.set_markup("<i>Waiting for pending saves...</i>")
+        self.capture_button.set_sensitive(self.encoder.has_capacity())
         self.delay_spin.set_sensitive(True)
+        self.burst_spin.set_sensitive(True)
+        self.interval_spin.set_sensitive(True)
         self.cancel_button.set_label("Cancel")
         
     def on_capture(self, widget):
         """Handle capture button click"""
-        delay = int(self.delay_spin.get_value())
+        self.start_capture(self.monitor_combo.get_active(), int(self.delay_spin.get_value()))
+    
+    def start_capture(self, selected_index, delay, plain=False):
+        """Capture monitor selected_index (or All Monitors) after delay seconds.
+        
+        With plain, the crop overlay is shown without a burst or saved region.
+        """
+        self.status_message = ""
+        self.plain_capture = plain
+        self.capture_started = GLib.get_monotonic_time()
+        TRACE.instant("capture requested", delay=delay,
+                      burst=1 if plain else int(self.burst_spin.get_value()))
         
         # Get selected monitor
-        selected_index = self.monitor_combo.get_active()
-        if selected_index >= 0 and selected_index < len(self.monitor_geometries):
+        self.capture_all = selected_index == len(self.monitor_geometries) > 1
+        if self.capture_all:
+            self.selected_monitor = None
+        elif selected_index >= 0 and selected_index < len(self.monitor_geometries):
             self.selected_monitor = self.monitor_geometries[selected_index]
         else:
             self.show_error("Please select a monitor")
@@ -424,6 +2298,8 @@ Tips:
         # Disable controls during countdown
         self.capture_button.set_sensitive(False)
         self.delay_spin.set_sensitive(False)
+        self.burst_spin.set_sensitive(False)
+        self.interval_spin.set_sensitive(False)
         self.cancel_button.set_label("Stop")
         
         if delay > 0:
@@ -431,10 +2307,7 @@ Tips:
             self.remaining_seconds = delay
             self.update_countdown()
         else:
-            self.hide()
-            while Gtk.events_pending():
-                Gtk.main_iteration()
-            GLib.timeout_add(200, self.capture_full_screen)
+            self.hide_then_capture()
     
     def update_countdown(self):
         """Update countdown display"""
@@ -443,6 +2316,7 @@ Tips:
             return False
             
         if self.remaining_seconds > 0:
+            TRACE.instant("countdown", remaining=self.remaining_seconds)
             self.countdown_label.set_markup(
                 f"<big><b>Capturing in {self.remaining_seconds} seconds...</b></big>\n"
                 f"<i>Prepare your screen now!</i>"
@@ -454,39 +2328,96 @@ Tips:
             self.countdown_active = False
             
             # Hide window and capture
-            self.hide()
-            while Gtk.events_pending():
-                Gtk.main_iteration()
-            
-            # Small delay to ensure window is hidden
-            GLib.timeout_add(200, self.capture_full_screen)
+            self.hide_then_capture()
         
         return False
     
+    def hide_then_capture(self, fallback_ms=300):
+        """Hide the main window and capture as soon as it is off screen.
+        
+        With a compositor the window is made fully transparent first, and the
+        capture starts once a frame painted that way has been shown: GDK
+        starts the next frame only after the compositor reports the previous
+        one drawn (_NET_WM_FRAME_DRAWN), so the second after-paint is that
+        confirmation. Without a compositor, the capture waits for the
+        unmap-event plus hide_settle_ms for the windows below to repaint.
+        fallback_ms covers compositors and window managers that never answer.
+        """
+        self.hide_started = GLib.get_monotonic_time()
+        if not self.get_mapped():
+            # Already hidden, e.g. a daemon capture
+            GLib.idle_add(self.capture_full_screen)
+            return
+        
+        state = {'done': False}
+        clock = self.get_frame_clock()
+        composited = self.get_screen().is_composited() and clock is not None
+        
+        def capture():
+            if not state['done']:
+                state['done'] = True
+                if composited:
+                    clock.disconnect(handler_id)
+                    self.hide()
+                    self.set_opacity(1)
+                else:
+                    self.disconnect(handler_id)
+                self.capture_full_screen()
+            return False
+        
+        if composited:
+            frames = {'painted': 0}
+            
+            def on_after_paint(clock):
+                frames['painted'] += 1
+                if frames['painted'] == 1:
+                    # Only starts once the compositor has shown the transparent frame
+                    clock.request_phase(Gdk.FrameClockPhase.PAINT)
+                else:
+                    TRACE.complete("transparent frame shown", self.hide_started)
+                    GLib.idle_add(capture)
+            
+            handler_id = clock.connect("after-paint", on_after_paint)
+            GLib.timeout_add(fallback_ms, capture)
+            self.set_opacity(0)
+            self.queue_draw()
+            return
+        
+        settle_ms = self.config.get('hide_settle_ms', 40)
+        
+        def on_unmap(widget, event):
+            TRACE.complete("unmap", self.hide_started)
+            GLib.timeout_add(settle_ms, capture)
+            return False
+        
+        handler_id = self.connect("unmap-event", on_unmap)
+        GLib.timeout_add(fallback_ms + settle_ms, capture)
+        self.hide()
+    
     def capture_full_screen(self):
         """Capture the selected monitor"""
+        TRACE.complete("hide window", self.hide_started)
         try:
+            if self.capture_all:
+                self.capture_all_monitors()
+                return False
+            
             if not self.selected_monitor:
                 self.show_error("No monitor selected")
                 return False
             
-            screen = Gdk.Screen.get_default()
-            root_window = screen.get_root_window()
-            
-            # Get the selected monitor's geometry
-            geometry = self.selected_monitor['geometry']
-            x = geometry.x
-            y = geometry.y
-            width = geometry.width
-            height = geometry.height
+            frames = 1 if self.plain_capture else int(self.burst_spin.get_value())
+            if frames > 1:
+                self.start_burst(frames, int(self.interval_spin.get_value()))
+                return False
             
+            region = None if self.plain_capture else self.selected_region()
+            if region:
+                self.capture_region(region)
+                return False
             
-            # Capture just this monitor
-            self.captured_pixbuf = Gdk.pixbuf_get_from_window(
-                root_window,
-                x, y,
-                width, height
-            )
+            # Capture just the selected monitor
+            self.captured_pixbuf = grab_monitor(self.selected_monitor['geometry'])
             
             if self.captured_pixbuf:
                 # Show crop interface
@@ -499,6 +2430,127 @@ Tips:
             
         return False
     
+    def capture_region(self, region):
+        """Grab only a saved region of the selected monitor and save it, no overlay"""
+        geometry = self.selected_monitor['geometry']
+        x, y, width, height = region
+        pixbuf = grab_area(geometry.x + x, geometry.y + y, width, height)
+        if not pixbuf:
+            self.show_error("Failed to capture screen")
+            return
+        self.captured_pixbuf = pixbuf
+        self.save_full_screenshot()
+    
+    def capture_all_monitors(self):
+        """Grab every monitor and save one file per monitor on the encoder pool"""
+        start = time.perf_counter()
+        trace_start = GLib.get_monotonic_time()
+        pixbufs, skew_ms = grab_all_monitors(self.monitor_geometries)
+        if not all(pixbufs):
+            self.show_error("Failed to capture screen")
+            return
+        
+        if not self.encoder.has_capacity(len(pixbufs)):
+            self.show_error("Too many screenshots are still being saved")
+            return
+        
+        quick = self.config.get('quick_save', False)
+        if quick:
+            paths = []
+            try:
+                for i, pixbuf in enumerate(pixbufs):
+                    paths.append(self.quick_save_path(pixbuf.get_width(),
+                                                      pixbuf.get_height(), i + 1))
+            except OSError as e:
+                # Give back the names already claimed for the other monitors
+                for path in paths:
+                    remove_placeholder(path)
+                self.show_error(f"Error saving screenshot: {str(e)}")
+                return
+        else:
+            filepath = self.prompt_for_filename()
+            if not filepath:
+                # User cancelled
+                self.reset_ui()
+                self.show()
+                return
+            paths = monitor_output_paths(filepath, len(pixbufs))
+        
+        batch = {'remaining': len(paths), 'failed': False}
+        
+        def on_saved(path, error):
+            self.on_save_finished(path, error)
+            batch['remaining'] -= 1
+            batch['failed'] = batch['failed'] or error is not None
+            if batch['remaining'] == 0:
+                TRACE.complete("all monitors", trace_start, files=len(paths),
+                               skew_ms=round(skew_ms, 2))
+                if SHOW_STATS:
+                    print(f"All monitors: {len(paths)} files in "
+                          f"{(time.perf_counter() - start) * 1000:.1f} ms "
+                          f"(grab skew {skew_ms:.1f} ms)")
+                if quick and not batch['failed']:
+                    self.set_status(f"Saved {len(paths)} monitors to "
+                                    f"{os.path.basename(paths[0])}...")
+        
+        for pixbuf, path in zip(pixbufs, paths):
+            self.encoder.submit(pixbuf, path, on_saved, self.encoder_settings())
+            self.pending_saves[path] = self.auto_post_save_actions(path)
+        if quick:
+            self.show_saved_status(f"Saving {len(paths)} monitors...")
+        else:
+            self.show_success(paths[0], f"{len(paths)} monitors, "
+                                        f"grab skew {skew_ms:.1f} ms", files=paths)
+    
+    def start_burst(self, count, interval_ms):
+        """Capture count frames of the selected monitor, interval_ms apart"""
+        max_bytes = self.config.get('burst_memory_mb', 512) * 1024 * 1024
+        self.frames = FrameRing(count, max_bytes)
+        self.burst = {
+            'count': count,
+            'interval': interval_ms,
+            'start': GLib.get_monotonic_time()
+        }
+        self.capture_burst_frame()
+    
+    def capture_burst_frame(self):
+        """Grab the next burst frame and schedule the one after it"""
+        try:
+            grab_time = GLib.get_monotonic_time()
+            pixbuf = grab_monitor(self.selected_monitor['geometry'])
+            if not pixbuf:
+                self.frames = None
+                self.show_error("Failed to capture screen")
+                return False
+            self.frames.append(pixbuf, grab_time, GLib.get_monotonic_time() - grab_time)
+            
+            grabbed = len(self.frames.grab_times)
+            if grabbed < self.burst['count']:
+                # Aim at start + n * interval so timer lateness does not accumulate
+                next_time = self.burst['start'] + grabbed * self.burst['interval'] * 1000
+                wait_ms = max(0, (next_time - GLib.get_monotonic_time()) // 1000)
+                GLib.timeout_add(wait_ms, self.capture_burst_frame)
+                return False
+            
+            if TRACE.enabled:
+                mean_jitter, max_jitter = self.frames.jitter_ms(self.burst['interval'])
+                TRACE.complete("burst", self.burst['start'], frames=grabbed,
+                               interval_ms=self.burst['interval'],
+                               mean_jitter_ms=round(mean_jitter, 2),
+                               max_jitter_ms=round(max_jitter, 2))
+            if SHOW_STATS:
+                print(self.frames.timing_report(self.burst['interval']))
+            
+            # Start on the newest frame, the overlay lets the user pick another
+            self.captured_pixbuf = self.frames[-1]['pixbuf']
+            self.show_crop_interface()
+            
+        except Exception as e:
+            self.frames = None
+            self.show_error(f"Error capturing screen: {str(e)}")
+            
+        return False
+    
     def show_crop_interface(self):
         """Show interface to crop the captured screenshot on the selected monitor"""
         # Create overlay window
@@ -520,9 +2572,12 @@ Tips:
         crop_window.move(mon_x, mon_y)
         crop_window.set_default_size(mon_width, mon_height)
         
-        # Use the captured pixbuf dimensions (same as monitor)
-        screen_width = self.captured_pixbuf.get_width()
-        screen_height = self.captured_pixbuf.get_height()
+        # The overlay works in logical pixels; the capture may have more
+        # (HiDPI scaling, or a capture larger than the monitor reports)
+        screen_width = mon_width
+        screen_height = mon_height
+        device_scale = self.selected_monitor['monitor'].get_scale_factor()
+        capture_scale = self.captured_pixbuf.get_width() / mon_width
         
         # Make window handle transparency
         screen = Gdk.Screen.get_default()
@@ -536,21 +2591,111 @@ Tips:
         # Track escape key presses for failsafe
         escape_count = {"count": 0, "last_time": 0}
         
+        # Redraw statistics for the current drag
+        drag_stats = {"events": 0, "frames": 0, "start_time": 0}
+        
+        # Latest pointer position, applied once per frame by the frame clock
+        pending_motion = {"position": None, "tick_id": 0}
+        
+        # Convert the capture to cairo surfaces once per crop session, so a
+        # redraw is just two blits. Dropped when the window goes away.
+        backdrop = {}
+        crop_window.connect("destroy", lambda w: backdrop.clear())
+        previews = {}  # Burst frame index -> preview at the overlay's resolution
+        
+        def set_backdrop(index, pixbuf):
+            """Show pixbuf, sized for the overlay's device pixels, as the backdrop"""
+            previews[index] = pixbuf
+            backdrop["bright"], backdrop["dimmed"] = build_backdrop_surfaces(
+                pixbuf, pixbuf.get_width() / mon_width)
+        
+        def load_backdrop(widget, index):
+            """Backdrop for a capture; oversized ones get a quick preview first.
+            
+            A capture with more pixels than the overlay can show would be
+            resampled on every redraw. Instead a coarse preview is shown at
+            once, and a filtered one is built from a pyramid of halved copies
+            on a worker thread, then swapped in.
+            """
+            if index in previews:
+                set_backdrop(index, previews[index])
+                return
+            pixbuf = self.captured_pixbuf
+            width, height = mon_width * device_scale, mon_height * device_scale
+            if pixbuf.get_width() <= width * 1.25:
+                set_backdrop(index, pixbuf)
+                return
+            
+            quick_height = round(pixbuf.get_height() * width / pixbuf.get_width())
+            set_backdrop(index, pixbuf.scale_simple(width, quick_height,
+                                                    GdkPixbuf.InterpType.NEAREST))
+            del previews[index]  # Not the final one
+            
+            def build():
+                with TRACE.span("preview pyramid", width=pixbuf.get_width(),
+                                height=pixbuf.get_height()):
+                    levels = build_preview_pyramid(pixbuf, width)
+                    preview = preview_from_pyramid(levels, width, quick_height)
+                GLib.idle_add(on_built, preview)
+            
+            def on_built(preview):
+                if backdrop and frame_state["index"] == index:
+                    set_backdrop(index, preview)
+                    widget.queue_draw()
+                elif backdrop:
+                    previews[index] = preview
+                return False
+            
+            import threading
+            threading.Thread(target=build, daemon=True).start()
+        
+        # Burst frames stay in memory only while the overlay is open
+        frame_state = {"index": len(self.frames) - 1 if self.frames else 0}
+        load_backdrop(crop_window, frame_state["index"])
+        crop_window.connect("destroy", lambda w: setattr(self, "frames", None))
+        self.crop_window = crop_window
+        crop_window.connect("destroy", lambda w: setattr(self, "crop_window", None))
+        
+        def get_selection_rect():
+            """Return the selection as (x, y, width, height), or None"""
+            if not (selection["start"] and selection["end"]):
+                return None
+            x = min(selection["start"][0], selection["end"][0])
+            y = min(selection["start"][1], selection["end"][1])
+            w = abs(selection["end"][0] - selection["start"][0])
+            h = abs(selection["end"][1] - selection["start"][1])
+            return x, y, w, h
+        
+        def invalidate_selection(widget, rect):
+            """Queue a redraw of the area covered by a selection and its label"""
+            if rect:
+                x, y, w, h = rect
+                # Border is 2px wide, the label box reaches 152x62 from the corner
+                widget.queue_draw_area(int(x) - 2, int(y) - 2,
+                                       int(max(w, 152)) + 5, int(max(h, 62)) + 5)
+        
         def on_draw(widget, cr):
-            # Draw the captured screenshot
-            Gdk.cairo_set_source_pixbuf(cr, self.captured_pixbuf, 0, 0)
-            cr.paint()
+            if not TRACE.enabled:
+                return draw_overlay(widget, cr)
+            x1, y1, x2, y2 = cr.clip_extents()
+            with TRACE.span("draw overlay", width=int(x2 - x1), height=int(y2 - y1),
+                            dragging=selection["dragging"]):
+                return draw_overlay(widget, cr)
+        
+        def draw_overlay(widget, cr):
+            if not backdrop:
+                return False
+            if selection["dragging"]:
+                drag_stats["frames"] += 1
             
-            # Darken overlay
-            cr.set_source_rgba(0, 0, 0, 0.3)
+            # Draw the darkened screenshot (GTK clips cr to the damaged region)
+            cr.set_source_surface(backdrop["dimmed"], 0, 0)
             cr.paint()
             
             # Draw selection area if we have valid coordinates
-            if selection["start"] and selection["end"]:
-                x = min(selection["start"][0], selection["end"][0])
-                y = min(selection["start"][1], selection["end"][1])
-                w = abs(selection["end"][0] - selection["start"][0])
-                h = abs(selection["end"][1] - selection["start"][1])
+            rect = get_selection_rect()
+            if rect:
+                x, y, w, h = rect
                 
                 # Only process if we have a valid selection area
                 if w > 1 and h > 1:
@@ -559,8 +2704,8 @@ Tips:
                     cr.rectangle(x, y, w, h)
                     cr.clip()
                     
-                    # Redraw just the selected portion from pixbuf
-                    Gdk.cairo_set_source_pixbuf(cr, self.captured_pixbuf, 0, 0)
+                    # Redraw just the selected portion undarkened
+                    cr.set_source_surface(backdrop["bright"], 0, 0)
                     cr.paint()
                     cr.restore()
                     
@@ -584,13 +2729,14 @@ Tips:
                         # Draw text
                         cr.set_source_rgba(1, 1, 1, 1)
                         cr.set_font_size(14)
-                        dim_text = f"{int(w)} × {int(h)}"
+                        # Size of the saved image, in capture pixels
+                        dim_text = f"{round(w * capture_scale)} × {round(h * capture_scale)}"
                         cr.move_to(x + 8, y + 20)
                         cr.show_text(dim_text)
                         
                         cr.set_font_size(12)
                         cr.move_to(x + 8, y + 40)
-                        cr.show_text("Enter: Save")
+                        cr.show_text("Enter: Save   C: Copy")
                         cr.move_to(x + 8, y + 55)
                         cr.show_text("Escape: Cancel")
             else:
@@ -611,6 +2757,37 @@ Tips:
                 extents2 = cr.text_extents(text2)
                 cr.move_to(text_x - extents2.width/2, 90)
                 cr.show_text(text2)
+            
+            if self.frames and len(self.frames) > 1:
+                draw_frame_indicator(cr)
+        
+        def draw_frame_indicator(cr):
+            """Show which burst frame is displayed, at the bottom of the monitor"""
+            frame = self.frames[frame_state["index"]]
+            offset_ms = (frame["time"] - self.frames[0]["time"]) / 1000
+            text = (f"Frame {frame_state['index'] + 1}/{len(self.frames)} "
+                    f"(+{offset_ms:.0f} ms)  ←/→: choose frame")
+            
+            cr.select_font_face("Sans", 0, 0)
+            cr.set_font_size(16)
+            extents = cr.text_extents(text)
+            text_x = (screen_width - extents.width) / 2
+            text_y = screen_height - 40
+            
+            cr.set_source_rgba(0, 0, 0, 0.7)
+            cr.rectangle(text_x - 10, text_y - extents.height - 8,
+                         extents.width + 20, extents.height + 16)
+            cr.fill()
+            cr.set_source_rgba(1, 1, 1, 1)
+            cr.move_to(text_x, text_y)
+            cr.show_text(text)
+        
+        def show_frame(widget, index):
+            """Switch the overlay and the capture to another burst frame"""
+            frame_state["index"] = index
+            self.captured_pixbuf = self.frames[index]["pixbuf"]
+            load_backdrop(widget, index)
+            widget.queue_draw()
         
         def on_key_press(widget, event):
             if event.keyval == Gdk.KEY_Escape:
@@ -635,21 +2812,48 @@ Tips:
                 self.show()
                 return True
             elif event.keyval == Gdk.KEY_Return or event.keyval == Gdk.KEY_KP_Enter:
-                if selection["start"] and selection["end"]:
+                rect = get_selection_rect()
+                if rect:
                     # Save the selected area
-                    x = int(min(selection["start"][0], selection["end"][0]))
-                    y = int(min(selection["start"][1], selection["end"][1]))
-                    w = int(abs(selection["end"][0] - selection["start"][0]))
-                    h = int(abs(selection["end"][1] - selection["start"][1]))
+                    x, y, w, h = (int(v) for v in rect)
                     
                     if w > 5 and h > 5:
                         crop_window.destroy()
-                        self.save_cropped_area(x, y, w, h)
+                        # Shift+Enter always asks for a file name
+                        ask = bool(event.state & Gdk.ModifierType.SHIFT_MASK)
+                        self.save_cropped_area(x, y, w, h, ask)
+                return True
+            elif event.keyval in (Gdk.KEY_c, Gdk.KEY_C):
+                # Copy the selected area to the clipboard, no file involved
+                start_time = GLib.get_monotonic_time()
+                rect = get_selection_rect()
+                if rect:
+                    x, y, w, h = (int(v) for v in rect)
+                    if w > 5 and h > 5:
+                        crop_window.destroy()
+                        self.copy_cropped_area(x, y, w, h, start_time)
+                return True
+            elif event.keyval in (Gdk.KEY_t, Gdk.KEY_T) and not self.frames:
+                # Scrolling capture of the selected area
+                rect = get_selection_rect()
+                if rect:
+                    x, y, w, h = (int(v) for v in rect)
+                    if w > 5 and h > 50:
+                        crop_window.destroy()
+                        self.start_scroll_capture(x, y, w, h)
+                return True
+            elif event.keyval in (Gdk.KEY_Left, Gdk.KEY_Right) and self.frames:
+                # Scrub through burst frames
+                step = -1 if event.keyval == Gdk.KEY_Left else 1
+                index = frame_state["index"] + step
+                if 0 <= index < len(self.frames):
+                    show_frame(widget, index)
                 return True
-            elif event.keyval == Gdk.KEY_s and event.state & Gdk.ModifierType.CONTROL_MASK:
-                # Ctrl+S to save full screen
+            elif event.keyval in (Gdk.KEY_s, Gdk.KEY_S) and \
+                    event.state & Gdk.ModifierType.CONTROL_MASK:
+                # Ctrl+S to save full screen, Ctrl+Shift+S always asks for a name
                 crop_window.destroy()
-                self.save_full_screenshot()
+                self.save_full_screenshot(bool(event.state & Gdk.ModifierType.SHIFT_MASK))
                 return True
             return False
         
@@ -657,20 +2861,54 @@ Tips:
             selection["start"] = (event.x, event.y)
             selection["end"] = (event.x, event.y)  # Initialize to same point
             selection["dragging"] = True
+            drag_stats["events"] = 0
+            drag_stats["frames"] = 0
+            drag_stats["start_time"] = GLib.get_monotonic_time()
+            # Full redraw once, to clear the instructions or the previous selection
             widget.queue_draw()
             return True
+        
+        def move_selection_end(widget, position):
+            old_rect = get_selection_rect()
+            selection["end"] = position
+            invalidate_selection(widget, old_rect)
+            invalidate_selection(widget, get_selection_rect())
+        
+        def on_tick(widget, frame_clock):
+            # Apply only the newest pointer position seen since the last frame
+            pending_motion["tick_id"] = 0
+            position = pending_motion["position"]
+            pending_motion["position"] = None
+            if position and selection["dragging"]:
+                move_selection_end(widget, position)
+            return False
             
         def on_motion(widget, event):
             if selection["dragging"]:
-                selection["end"] = (event.x, event.y)
-                widget.queue_draw()
+                drag_stats["events"] += 1
+                pending_motion["position"] = (event.x, event.y)
+                if not pending_motion["tick_id"]:
+                    pending_motion["tick_id"] = widget.add_tick_callback(on_tick)
+            # With POINTER_MOTION_HINT_MASK the next motion event must be requested
+            Gdk.Event.request_motions(event)
             return True
                 
         def on_button_release(widget, event):
             if selection["dragging"]:
+                if pending_motion["tick_id"]:
+                    widget.remove_tick_callback(pending_motion["tick_id"])
+                    pending_motion["tick_id"] = 0
+                pending_motion["position"] = None
+                move_selection_end(widget, (event.x, event.y))
                 selection["dragging"] = False
-                selection["end"] = (event.x, event.y)
-                widget.queue_draw()
+                TRACE.complete("drag", drag_stats["start_time"], events=drag_stats["events"],
+                               frames=drag_stats["frames"])
+                if SHOW_STATS:
+                    elapsed = (GLib.get_monotonic_time() - drag_stats["start_time"]) / 1000000
+                    fps = drag_stats["frames"] / elapsed if elapsed > 0 else 0
+                    print(f"Drag: {drag_stats['events']} motion events, "
+                          f"{drag_stats['frames']} frames in {elapsed:.2f}s "
+                          f"({fps:.1f} fps, {screen_width}x{screen_height} capture)")
             return True
         
         crop_window.connect("draw", on_draw)
@@ -683,6 +2921,7 @@ Tips:
             Gdk.EventMask.BUTTON_PRESS_MASK |
             Gdk.EventMask.BUTTON_RELEASE_MASK |
             Gdk.EventMask.POINTER_MOTION_MASK |
+            Gdk.EventMask.POINTER_MOTION_HINT_MASK |
             Gdk.EventMask.KEY_PRESS_MASK
         )
         
@@ -697,33 +2936,36 @@ Tips:
         # Make sure keyboard events work without using grab_add which can cause issues
         crop_window.set_can_focus(True)
         crop_window.grab_focus()
+        TRACE.complete("capture to overlay", self.capture_started)
     
-    def save_cropped_area(self, x, y, width, height):
-        """Save the cropped area"""
+    def capture_rect(self, x, y, width, height):
+        """Map a selection in monitor (logical) pixels to pixels of the capture"""
+        scale = self.captured_pixbuf.get_width() / self.selected_monitor['geometry'].width
+        if scale == 1:
+            return x, y, width, height
+        left, top = round(x * scale), round(y * scale)
+        return (left, top, round((x + width) * scale) - left,
+                round((y + height) * scale) - top)
+    
+    def save_cropped_area(self, x, y, width, height, ask=False):
+        """Save the cropped area, given in monitor (logical) pixels"""
         try:
-            # Ensure we don't go out of bounds
-            pixbuf_width = self.captured_pixbuf.get_width()
-            pixbuf_height = self.captured_pixbuf.get_height()
-            
-            # Clamp values to pixbuf dimensions
-            x = max(0, min(x, pixbuf_width - 1))
-            y = max(0, min(y, pixbuf_height - 1))
-            width = min(width, pixbuf_width - x)
-            height = min(height, pixbuf_height - y)
-            
-            if width <= 0 or height <= 0:
+            # Create cropped pixbuf at full capture resolution, kept within its bounds
+            cropped = crop_pixbuf(self.captured_pixbuf, *self.capture_rect(x, y, width, height))
+            if not cropped:
                 self.show_error("Invalid selection area")
                 return
+            self.remember_region(x, y, width, height)
             
-            # Create cropped pixbuf
-            cropped = self.captured_pixbuf.new_subpixbuf(x, y, width, height)
+            if self.config.get('quick_save', False) and not ask:
+                filepath = self.quick_save_path(cropped.get_width(), cropped.get_height())
+                self.queue_save(cropped, filepath, quick=True)
+                return
             
             # Prompt for filename
             filepath = self.prompt_for_filename()
             if filepath:
-                # Save
-                cropped.savev(filepath, "png", [], [])
-                self.show_success(filepath)
+                self.queue_save(cropped, filepath)
             else:
                 # User cancelled, go back to main window
                 self.reset_ui()
@@ -732,6 +2974,145 @@ Tips:
         except Exception as e:
             self.show_error(f"Error saving screenshot: {str(e)}")
     
+    def start_scroll_capture(self, x, y, width, height, interval_ms=100, idle_ms=2000):
+        """Grab the area every interval_ms while the user scrolls it, stitching as we go.
+        
+        Stops after idle_ms without movement (five times as long before the
+        first scroll), then saves like any other capture.
+        """
+        geometry = self.selected_monitor['geometry']
+        region = clamp_region((x, y, width, height), geometry)
+        if not region:
+            self.show_error("Invalid selection area")
+            return
+        self.remember_region(*region)
+        x, y, width, height = region
+        
+        stitcher = ScrollStitcher()
+        self.captured_pixbuf = None
+        state = {'idle': 0, 'moved': False, 'first': True}
+        
+        def grab_next():
+            pixbuf = grab_area(geometry.x + x, geometry.y + y, width, height)
+            if not pixbuf:
+                self.show_error("Failed to capture screen")
+                return False
+            with TRACE.span("stitch frame"):
+                added = stitcher.add_frame(pixbuf)
+            if state['first']:
+                # The first frame is the starting point, not a scroll
+                state['first'] = False
+            elif added is None:
+                print("Scrolled too far to match, stopping")
+            elif added:
+                state['moved'] = True
+                state['idle'] = 0
+            else:
+                state['idle'] += interval_ms
+            
+            limit = idle_ms if state['moved'] else idle_ms * 5
+            if added is None or stitcher.full() or state['idle'] >= limit:
+                self.save_scroll_capture(stitcher)
+                return False
+            return True
+        
+        GLib.timeout_add(interval_ms, grab_next)
+    
+    def save_scroll_capture(self, stitcher):
+        """Save a stitched scrolling capture, streamed from its spool file"""
+        stitcher.finish()
+        if self.config.get('quick_save', False):
+            try:
+                filepath = self.quick_save_path(stitcher.width, stitcher.height)
+            except OSError as e:
+                self.show_error(f"Error saving screenshot: {str(e)}")
+                return
+        else:
+            self.show()
+            filepath = self.prompt_for_filename()
+            if not filepath:
+                self.reset_ui()
+                return
+        
+        if not self.encoder.submit(stitcher, filepath, self.on_save_finished,
+                                   self.encoder_settings(), writer=ScrollStitcher.save):
+            remove_placeholder(filepath)
+            self.show_error("Too many screenshots are still being saved")
+            return
+        self.pending_saves[filepath] = self.auto_post_save_actions(filepath)
+        self.report_when_saved(filepath, self.config.get('quick_save', False),
+                               f"Scrolling capture, {stitcher.width}x{stitcher.height}")
+    
+    def copy_cropped_area(self, x, y, width, height, start_time):
+        """Put the cropped area on the clipboard, optionally saving it in the background"""
+        cropped = crop_pixbuf(self.captured_pixbuf, *self.capture_rect(x, y, width, height))
+        if not cropped:
+            self.show_error("Invalid selection area")
+            return
+        self.remember_region(x, y, width, height)
+        # A copy, so the clipboard does not keep the whole capture alive
+        cropped = cropped.copy()
+        clipboard = Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD)
+        clipboard.set_image(cropped)
+        self.clipboard_owned = True
+        TRACE.complete("copy to clipboard", start_time, width=width, height=height)
+        if SHOW_STATS:
+            latency = (GLib.get_monotonic_time() - start_time) / 1000
+            print(f"Clipboard: {width}x{height} ready in {latency:.1f} ms")
+        
+        message = "Copied to clipboard"
+        if self.config.get('clipboard_also_save', False):
+            try:
+                filepath = self.quick_save_path(cropped.get_width(), cropped.get_height())
+            except OSError as e:
+                self.show_error(f"Error saving screenshot: {str(e)}")
+                return
+            if self.encoder.submit(cropped, filepath, self.on_save_finished,
+                                   self.encoder_settings()):
+                self.pending_saves[filepath] = self.auto_post_save_actions(filepath)
+                message += f" and saving {os.path.basename(filepath)}"
+            else:
+                remove_placeholder(filepath)
+                message += ", too many saves pending to save it"
+        self.show_saved_status(message)
+    
+    def quick_save_path(self, width, height, monitor=None):
+        """Claim a file in the save folder named after the filename template"""
+        if monitor is None:
+            monitor = self.selected_monitor['index'] + 1 if self.selected_monitor else 0
+        now = datetime.now()
+        fields = {
+            'date': now.strftime("%Y-%m-%d"),
+            'time': now.strftime("%H-%M-%S"),
+            'monitor': monitor,
+            'width': width,
+            'height': height,
+        }
+        extension = IMAGE_FORMATS[self.encoder_settings()['output_format']]['extensions'][0]
+        folder = self.save_folder
+        os.makedirs(folder, exist_ok=True)
+        
+        counters = self.config.setdefault('sequence_counters', {})
+        template = self.config.get('filename_template', DEFAULT_FILENAME_TEMPLATE)
+        try:
+            path, seq = create_unique_file(folder, template, fields, extension,
+                                           counters.get(folder, 1))
+        except (KeyError, ValueError, IndexError, AttributeError) as e:
+            print(f"Invalid filename_template {template!r}: {e}")
+            path, seq = create_unique_file(folder, DEFAULT_FILENAME_TEMPLATE, fields,
+                                           extension, counters.get(folder, 1))
+        if "{seq" in template:
+            counters[folder] = seq + 1
+            self.save_config()
+        return path
+    
+    def show_saved_status(self, message):
+        """Report a save in the main window instead of a dialog"""
+        self.captured_pixbuf = None
+        self.status_message = f"<i>{GLib.markup_escape_text(message)}</i>"
+        self.reset_ui()
+        self.show()
+    
     def prompt_for_filename(self):
         """Prompt user for filename"""
         dialog = Gtk.FileChooserDialog(
@@ -748,28 +3129,50 @@ Tips:
         os.makedirs(self.save_folder, exist_ok=True)
         dialog.set_current_folder(self.save_folder)
         
-        # Suggest a default filename
+        # Suggest a default filename in the selected format
+        output_format = self.encoder_settings()['output_format']
+        extension = IMAGE_FORMATS[output_format]['extensions'][0]
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        dialog.set_current_name(f"Screenshot_{timestamp}.png")
+        dialog.set_current_name(f"Screenshot_{timestamp}{extension}")
         
-        # Add file filter for PNG
-        filter_png = Gtk.FileFilter()
-        filter_png.set_name("PNG images")
-        filter_png.add_mime_type("image/png")
-        filter_png.add_pattern("*.png")
-        dialog.add_filter(filter_png)
+        # Add a file filter per format, the selected format first
+        for name in sorted(writable_formats(), key=lambda n: n != output_format):
+            file_filter = Gtk.FileFilter()
+            file_filter.set_name(IMAGE_FORMATS[name]['label'])
+            file_filter.add_mime_type(IMAGE_FORMATS[name]['mime'])
+            for ext in IMAGE_FORMATS[name]['extensions']:
+                file_filter.add_pattern(f"*{ext}")
+            dialog.add_filter(file_filter)
         
         # Set overwrite confirmation
         dialog.set_do_overwrite_confirmation(True)
         
-        response = dialog.run()
         filepath = None
-        
-        if response == Gtk.ResponseType.OK:
+        while filepath is None:
+            with TRACE.span("file dialog"):
+                response = dialog.run()
+            if response != Gtk.ResponseType.OK:
+                break
             filepath = dialog.get_filename()
-            # Ensure .png extension
-            if not filepath.endswith('.png'):
-                filepath += '.png'
+            # Ensure a known extension, the format follows it
+            if not format_for_path(filepath):
+                filepath += extension
+            # Ask again rather than fail in the encoder, e.g. .webp without its loader
+            error = unwritable_format_error(format_for_path(filepath))
+            if error:
+                message = Gtk.MessageDialog(
+                    transient_for=dialog,
+                    flags=0,
+                    message_type=Gtk.MessageType.ERROR,
+                    buttons=Gtk.ButtonsType.OK,
+                    text="Format Not Available"
+                )
+                message.format_secondary_text(error)
+                message.run()
+                message.destroy()
+                filepath = None
+        
+        if filepath:
             # Update save folder to remember location
             new_folder = os.path.dirname(filepath)
             if new_folder != self.save_folder:
@@ -780,13 +3183,18 @@ Tips:
         dialog.destroy()
         return filepath
     
-    def save_full_screenshot(self):
+    def save_full_screenshot(self, ask=False):
         """Save the full screenshot without cropping"""
         try:
+            if self.config.get('quick_save', False) and not ask:
+                filepath = self.quick_save_path(self.captured_pixbuf.get_width(),
+                                                self.captured_pixbuf.get_height())
+                self.queue_save(self.captured_pixbuf, filepath, quick=True)
+                return
+            
             filepath = self.prompt_for_filename()
             if filepath:
-                self.captured_pixbuf.savev(filepath, "png", [], [])
-                self.show_success(filepath)
+                self.queue_save(self.captured_pixbuf, filepath)
             else:
                 # User cancelled
                 self.reset_ui()
@@ -795,50 +3203,272 @@ Tips:
         except Exception as e:
             self.show_error(f"Error saving screenshot: {str(e)}")
     
-    def show_success(self, filepath):
-        """Show success dialog"""
+    def queue_save(self, pixbuf, filepath, quick=False):
+        """Write pixbuf in the background, after checking it for duplicates.
+        
+        The hash and the index lookup run on the encoder pool; only the
+        question about a near-identical screenshot is asked on the main loop.
+        """
+        if not self.config.get('detect_duplicates', True):
+            self.submit_save(pixbuf, filepath, quick)
+            return
+        if self.hash_lock is None:
+            import threading
+            self.hash_lock = threading.Lock()
+        
+        def on_checked(result, error):
+            if error:
+                print(f"Duplicate check failed: {error}")
+                self.submit_save(pixbuf, filepath, quick)
+                return
+            index, image_hash, duplicate = result
+            if duplicate and not self.confirm_duplicate(duplicate):
+                # Keep the existing screenshot
+                if quick:
+                    remove_placeholder(filepath)
+                self.reset_ui()
+                self.show()
+                return
+            
+            name = os.path.basename(filepath)
+            
+            def write_and_index(pixbuf, filepath, settings):
+                write_image(pixbuf, filepath, settings)
+                with self.hash_lock:
+                    index.add(image_hash, name)
+            self.submit_save(pixbuf, filepath, quick, write_and_index)
+        
+        self.encoder.run(lambda: self.check_duplicate(pixbuf, filepath), on_checked)
+    
+    def check_duplicate(self, pixbuf, filepath):
+        """Hash pixbuf and look it up in its folder's index, on an encoder thread.
+        
+        Returns the index, the hash and the name of a near-identical screenshot or None.
+        """
+        with TRACE.span("duplicate check"):
+            image_hash = dhash(pixbuf)
+            with self.hash_lock:
+                index = self.get_hash_index(os.path.dirname(filepath))
+                duplicate = self.find_duplicate(index, image_hash, os.path.basename(filepath))
+        return index, image_hash, duplicate
+    
+    def submit_save(self, pixbuf, filepath, quick=False, writer=write_image):
+        """Queue pixbuf for writing and report it once it is written"""
+        after_save = self.auto_post_save_actions(filepath)
+        if not self.encoder.submit(pixbuf, filepath, self.on_save_finished,
+                                   self.encoder_settings(), writer):
+            if quick:
+                remove_placeholder(filepath)
+            self.show_error("Too many screenshots are still being saved")
+            return
+        self.pending_saves[filepath] = after_save
+        self.report_when_saved(filepath, quick)
+    
+    def report_when_saved(self, filepath, quick, details=None, label=None):
+        """Show that filepath is being written, and the outcome once it is.
+        
+        Success is only claimed once the write has completed, so it can never
+        be followed by an error for the same file. For quick saves it is a
+        note in the main window, otherwise the success dialog, which opens
+        at once in a Saving state.
+        """
+        label = label or os.path.basename(filepath)
+        if quick:
+            note = f"Saved {label}" + (f" ({details})" if details else "")
+            self.when_saved(filepath, lambda: self.set_status(note))
+            self.show_saved_status(f"Saving {label}...")
+        else:
+            self.show_success(filepath, details)
+    
+    def set_status(self, message):
+        """Replace the note in the main window"""
+        self.status_message = f"<i>{GLib.markup_escape_text(message)}</i>"
+        if not self.countdown_active:
+            self.reset_ui()
+    
+    def get_hash_index(self, folder):
+        """Duplicate index of folder, loaded once and refreshed if changed on disk"""
+        index = self.hash_indexes.get(folder)
+        if index is None:
+            index = self.hash_indexes[folder] = HashIndex(folder)
+        elif index.is_stale():
+            index.load()
+        return index
+    
+    def find_duplicate(self, index, image_hash, filename):
+        """Name of an existing near-identical screenshot in the index, or None"""
+        threshold = self.config.get('duplicate_threshold', 4)
+        for distance, name in index.find(image_hash, threshold):
+            # Ignore the file being overwritten and files deleted since
+            if name != filename and os.path.exists(os.path.join(index.folder, name)):
+                return name
+        return None
+    
+    def confirm_duplicate(self, existing):
+        """Ask whether to save a screenshot that looks like an existing one"""
+        dialog = Gtk.MessageDialog(
+            transient_for=self,
+            flags=0,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=Gtk.ButtonsType.NONE,
+            text="Similar Screenshot Exists"
+        )
+        dialog.format_secondary_text(
+            f"This capture looks nearly identical to {existing} in the same folder.")
+        dialog.add_button("Keep Existing", Gtk.ResponseType.CANCEL)
+        dialog.add_button("Save Anyway", Gtk.ResponseType.OK)
+        dialog.set_default_response(Gtk.ResponseType.OK)
+        
+        response = dialog.run()
+        dialog.destroy()
+        return response == Gtk.ResponseType.OK
+    
+    def on_save_finished(self, filepath, error):
+        """Handle completion of a background save"""
+        actions = self.pending_saves.pop(filepath, [])
+        report = self.save_dialogs.pop(filepath, None)
+        if error:
+            remove_placeholder(filepath)
+            if report and report['dialog']:
+                # The dialog still says Saving, turn it into the error
+                dialog = report['dialog']
+                report['dialog'] = None
+                dialog.set_property("message-type", Gtk.MessageType.ERROR)
+                dialog.set_property("text", "Screenshot Not Saved")
+                dialog.format_secondary_text(f"Error saving screenshot: {str(error)}")
+                return
+            self.show_error(f"Error saving screenshot: {str(error)}")
+            return
+        for action in actions:
+            action()
+        if not self.countdown_active:
+            self.reset_ui()
+    
+    def when_saved(self, filepath, action):
+        """Run action once filepath has been written"""
+        if filepath in self.pending_saves:
+            self.pending_saves[filepath].append(action)
+        else:
+            action()
+    
+    def show_success(self, filepath, details=None, files=None):
+        """Show the success dialog, right away even while files are still written.
+        
+        files (default: just filepath) that are still being written are shown
+        as "Saving..." and the dialog is updated when they are done, or with
+        the error if one fails. Continue does not wait for them.
+        """
         self.reset_ui()
         
         # Get just the filename for display
         filename = os.path.basename(filepath)
+        folder = self.save_folder
+        pending = [path for path in (files or [filepath]) if path in self.pending_saves]
         
         dialog = Gtk.MessageDialog(
             transient_for=self,
             flags=0,
             message_type=Gtk.MessageType.INFO,
             buttons=Gtk.ButtonsType.NONE,
-            text="Screenshot Saved"
+            text="Saving Screenshot..." if pending else "Screenshot Saved"
         )
-        dialog.format_secondary_text(f"Saved: {filename}\nFolder: {self.save_folder}")
+        
+        def set_message(state):
+            message = f"{state}: {filename}\nFolder: {folder}"
+            if details:
+                message += f"\n{details}"
+            dialog.format_secondary_text(message)
+        set_message("Saving" if pending else "Saved")
+        
+        report = {'dialog': dialog, 'remaining': len(pending)}
+        
+        def on_written():
+            report['remaining'] -= 1
+            if report['dialog'] and report['remaining'] == 0:
+                dialog.set_property("text", "Screenshot Saved")
+                set_message("Saved")
+        for path in pending:
+            self.save_dialogs[path] = report
+            self.when_saved(path, on_written)
         
         dialog.add_button("Continue (New Screenshot)", 1)
         dialog.add_button("Open Folder", 2)
         dialog.add_button("Open Image", 3)
+        dialog.add_button("Copy Path", 5)
+        actions = self.post_save_actions()
+        for i, action in enumerate(actions):
+            if not action.get('auto'):
+                dialog.add_button(action['label'], 10 + i)
         dialog.add_button("Exit", 4)
         
         # Set Continue as default
         dialog.set_default_response(1)
         
         response = dialog.run()
+        report['dialog'] = None
+        for path in pending:
+            self.save_dialogs.pop(path, None)
         dialog.destroy()
         
-        if response == 1:
-            # Continue with new screenshot
-            self.captured_pixbuf = None
-            self.show()
-        elif response == 2:
-            # Open folder
-            os.system(f'xdg-open "{self.save_folder}"')
-            self.captured_pixbuf = None
-            self.show()
-        elif response == 3:
-            # Open image
-            os.system(f'xdg-open "{filepath}"')
-            self.captured_pixbuf = None
-            self.show()
-        else:
+        if response == 4 or response < 0:
             # Exit
-            Gtk.main_quit()
+            self.quit_or_hide()
+            return
+        
+        if response == 2:
+            open_path(self.save_folder, lambda error: self.on_action_finished("Open Folder", error))
+        elif response == 3:
+            self.when_saved(filepath, lambda: open_path(
+                filepath, lambda error: self.on_action_finished("Open Image", error)))
+        elif response == 5:
+            Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD).set_text(filepath, -1)
+        elif response >= 10:
+            action = actions[response - 10]
+            self.when_saved(filepath, lambda: self.run_post_save_action(action, filepath))
+        # Continue with new screenshot
+        self.captured_pixbuf = None
+        self.show()
+    
+    def post_save_actions(self):
+        """Valid user-defined post-save actions from the config"""
+        actions = []
+        for action in self.config.get('post_save_actions', []):
+            if isinstance(action, dict) and action.get('label') and action.get('command'):
+                actions.append(action)
+            else:
+                print(f"Ignoring invalid post-save action: {action!r}")
+        return actions
+    
+    def auto_post_save_actions(self, filepath):
+        """Callbacks for the post-save actions that run after every save"""
+        return [lambda action=action: self.run_post_save_action(action, filepath)
+                for action in self.post_save_actions() if action.get('auto')]
+    
+    def run_post_save_action(self, action, filepath):
+        """Start a user-defined action on a saved screenshot"""
+        label = action['label']
+        try:
+            argv = expand_command(action['command'], filepath)
+        except ValueError as e:
+            self.on_action_finished(label, str(e))
+            return
+        run_command(argv, lambda error: self.on_action_finished(label, error))
+    
+    def on_action_finished(self, label, error):
+        """Report a failed post-save action without interrupting the user"""
+        if not error:
+            return
+        print(f"{label} failed: {error}")
+        dialog = Gtk.MessageDialog(
+            transient_for=self,
+            flags=0,
+            message_type=Gtk.MessageType.WARNING,
+            buttons=Gtk.ButtonsType.OK,
+            text=f"{label} Failed"
+        )
+        dialog.format_secondary_text(error)
+        dialog.connect("response", lambda d, r: d.destroy())
+        dialog.show()
     
     def show_error(self, message):
         """Show error dialog"""
@@ -857,22 +3487,160 @@ Tips:
         self.show()
 
 
+def parse_region(text):
+    """Parse an x,y,width,height region argument"""
+    import argparse
+    try:
+        values = [int(v) for v in text.split(",")]
+    except ValueError:
+        values = []
+    if len(values) != 4 or values[2] <= 0 or values[3] <= 0:
+        raise argparse.ArgumentTypeError("region must be x,y,width,height")
+    return values
+
+
+def parse_args(argv):
+    """Parse command line arguments"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Screenshot with post-capture crop")
+    parser.add_argument("--capture", action="store_true",
+                        help="capture without opening any window and exit")
+    parser.add_argument("--monitor", type=int, default=1, metavar="N",
+                        help="monitor to capture, as numbered by Identify (default: 1)")
+    parser.add_argument("--all-monitors", action="store_true",
+                        help="capture every monitor to PATH-monitorN files")
+    parser.add_argument("--region", type=parse_region, metavar="X,Y,W,H",
+                        help="area to keep, relative to the monitor")
+    parser.add_argument("--output", metavar="PATH",
+                        help="file to write the capture to")
+    parser.add_argument("--scroll-capture", action="store_true",
+                        help="with --capture and --region: keep grabbing the region while "
+                             "it is scrolled and stitch one tall image")
+    parser.add_argument("--delay", type=float, default=0, metavar="SECONDS",
+                        help="wait before capturing (default: 0)")
+    parser.add_argument("--backend", choices=sorted(CAPTURE_BACKENDS),
+                        help="how the screen is read (default: gdk, or the config "
+                             "setting in the window)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="stay in the background and take commands from "
+                             "screenshot-crop-client")
+    parser.add_argument("--startup-benchmark", action="store_true",
+                        help="print import and first-map times as JSON and exit")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="write a timing trace of the session to PATH, in Chrome "
+                             "trace format (same as SCREENSHOT_CROP_TRACE=PATH)")
+    args = parser.parse_args(argv)
+    if args.capture and not args.output:
+        parser.error("--capture requires --output")
+    if args.scroll_capture and not (args.capture and args.region and not args.all_monitors):
+        parser.error("--scroll-capture requires --capture and --region")
+    if args.region and args.all_monitors:
+        parser.error("--region cannot be combined with --all-monitors")
+    return args
+
+
+def run_headless_capture(args):
+    """Capture, crop and save from the command line without building any widgets"""
+    # Only GDK is needed to talk to the display
+    ok, _ = Gdk.init_check(sys.argv[:1])
+    display = Gdk.Display.get_default() if ok else None
+    if not display:
+        print("Cannot open display", file=sys.stderr)
+        return 1
+    
+    if args.delay > 0:
+        time.sleep(args.delay)
+    
+    try:
+        if args.backend:
+            set_capture_backend(args.backend)
+        if args.all_monitors:
+            paths, skew_ms, wall_ms = capture_all_to_files(list_monitors(display),
+                                                           args.output)
+        elif args.scroll_capture:
+            print("Scroll the area now; capture stops when it stops moving", file=sys.stderr)
+            height = scroll_capture_to_file(list_monitors(display), args.monitor,
+                                            args.region, args.output)
+            print(f"Stitched {height} rows", file=sys.stderr)
+            paths = [args.output]
+        else:
+            capture_to_file(list_monitors(display), args.monitor, args.region,
+                            args.output)
+            paths = [args.output]
+    except CaptureError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    
+    for path in paths:
+        print(path)
+    if args.all_monitors:
+        print(f"Captured {len(paths)} monitors in {wall_ms:.1f} ms "
+              f"(grab skew {skew_ms:.1f} ms)", file=sys.stderr)
+    return 0
+
+
+def on_startup_benchmark_map(widget, event):
+    """Report startup timings once the main window is mapped, then quit"""
+    print(json.dumps({
+        'import_ms': round((IMPORT_DONE_TIME - START_TIME) * 1000, 1),
+        'first_map_ms': round((time.perf_counter() - START_TIME) * 1000, 1)
+    }))
+    GLib.idle_add(Gtk.main_quit)
+    return False
+
+
 def main():
+    args = parse_args(sys.argv[1:])
+    if args.trace and not TRACE.enabled:
+        TRACE.start(args.trace)
+    if args.capture:
+        sys.exit(run_headless_capture(args))
+    
     # Initialize GTK properly
     Gtk.init(sys.argv)
     
     win = ScreenshotCropTool()
-    win.show_all()
-    
-    # Connect delete event to ensure proper cleanup
-    win.connect("delete-event", lambda w, e: Gtk.main_quit())
+    if args.backend:
+        try:
+            set_capture_backend(args.backend)
+        except CaptureError as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
+    if args.daemon:
+        try:
+            win.start_daemon(remote_socket_path())
+        except (CaptureError, OSError) as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
+        # Widgets are realized hidden so the window is complete when shown later
+        win.get_child().show_all()
+        # Closing the window only hides it, the client can bring it back
+        win.connect("delete-event", lambda w, e: w.quit_or_hide() or True)
+    else:
+        if args.startup_benchmark:
+            win.connect("map-event", on_startup_benchmark_map)
+        win.show_all()
+        
+        # Connect delete event to ensure proper cleanup
+        win.connect("delete-event", lambda w, e: Gtk.main_quit())
     
     try:
         Gtk.main()
     except KeyboardInterrupt:
         print("\nInterrupted by user")
         Gtk.main_quit()
+    finally:
+        win.flush_config()  # A debounced write may still be pending
+        if win.clipboard_owned:
+            # Hand a copied crop to the clipboard manager, or it is gone with us
+            Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD).store()
+        if args.daemon and os.path.exists(win.socket_path):
+            os.remove(win.socket_path)
+
 
+IMPORT_DONE_TIME = time.perf_counter()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file